@@ -0,0 +1,72 @@
+"""
+Cached ``.env`` loading for the scripts in this folder.
+
+The project ``.env`` is parsed at most once per modification: the parsed
+values are memoised on the file's mtime, so repeated loads (several scripts
+imported from one driver or notebook) reuse the previous parse.
+
+Usage (from another script in scripts/):
+    from _env import load_env
+    load_env()
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import dotenv_values
+
+ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+
+
+@lru_cache(maxsize=1)
+def _parse(path: str, mtime_ns: int) -> Dict[str, Optional[str]]:
+    """Parse the .env file; the mtime is only part of the cache key."""
+    return dotenv_values(path)
+
+
+def read_env(path: Path = ENV_FILE) -> Dict[str, Optional[str]]:
+    """Return the values in ``path``, reparsing only if the file changed."""
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    return _parse(str(path), mtime_ns)
+
+
+def load_env(path: Path = ENV_FILE) -> None:
+    """Export the .env values to os.environ without overriding existing
+    variables (same behaviour as ``load_dotenv()``)."""
+    for key, value in read_env(path).items():
+        if value is not None:
+            os.environ.setdefault(key, value)
+
+
+def update_env(values: Dict[str, str], path: Path = ENV_FILE) -> bool:
+    """Set ``values`` in the .env file in a single streaming pass.
+
+    Existing lines for the given keys are replaced, every other line is kept
+    as is, and the new file is swapped in atomically with ``os.replace``.
+
+    Returns:
+        False without touching the file when every value is already set
+    """
+    current = read_env(path)
+    if all(current.get(key) == value for key, value in values.items()):
+        return False
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as out:
+        if path.exists():
+            with open(path) as src:
+                for line in src:
+                    key = line.split("=", 1)[0].strip()
+                    if key.startswith("export "):
+                        key = key[len("export "):].strip()
+                    if key in values:
+                        continue
+                    out.write(line if line.endswith("\n") else line + "\n")
+        for key, value in values.items():
+            out.write(f"{key}={value}\n")
+    os.replace(tmp_path, path)
+    return True
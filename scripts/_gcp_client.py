@@ -0,0 +1,411 @@
+"""
+Shared Vertex AI helpers for the scripts in this folder.
+
+The SDK is initialised once per process with a single set of Application
+Default Credentials, and the endpoint/model lookups that several scripts
+repeat are memoised.
+
+The SDK, the GAPIC clients and Cloud Storage are imported by the functions
+that use them, so importing this module (or running a script with --help)
+does not pay for them.
+
+Usage (from another script in scripts/):
+    from _gcp_client import get_endpoint, get_model, list_endpoints
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core.retry import Retry, if_transient_error
+from google.protobuf import field_mask_pb2
+from _env import load_env
+
+if TYPE_CHECKING:
+    from google.auth.credentials import Credentials
+    from google.cloud import aiplatform, storage
+    from google.cloud.aiplatform_v1 import (
+        EndpointServiceClient,
+        ModelServiceClient,
+        PipelineServiceClient,
+    )
+    from google.cloud.aiplatform_v1.types import Endpoint, Model, PipelineJob
+
+load_env()
+
+PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
+REGION = os.getenv("GCP_REGION", "europe-west2")
+
+PARENT = f"projects/{PROJECT_ID}/locations/{REGION}"
+API_ENDPOINT = f"{REGION}-aiplatform.googleapis.com"
+
+# Endpoints/models handled at the same time by the batch helpers (keeps the
+# fan-out under the per-project Vertex AI request quota)
+MAX_CONCURRENT_REQUESTS = 8
+
+# Retry for list/get calls: transient errors (429, 500, 503, connection
+# resets) are retried with jittered backoff from 0.5 s to 8 s for at most
+# 30 s; anything else fails straight away
+DEFAULT_RETRY = Retry(
+    initial=0.5,
+    maximum=8.0,
+    multiplier=2.0,
+    deadline=30.0,
+    predicate=if_transient_error,
+)
+
+# Channel options for the GAPIC clients below: keepalive pings keep the
+# HTTP/2 connection warm through long waits, and the unlimited message sizes
+# are the ones the default transports use
+GRPC_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+]
+
+# Everything the pipeline scripts read from a PipelineJob; pipeline_spec (the
+# whole compiled pipeline JSON) is deliberately left out.
+PIPELINE_JOB_LITE_FIELDS = (
+    "name",
+    "display_name",
+    "state",
+    "create_time",
+    "update_time",
+    "job_detail",
+    "runtime_config",
+    "template_uri",
+)
+
+
+def rid(name: str) -> str:
+    """Return the ID at the end of a resource name (a bare ID is returned as is).
+
+    Model version suffixes (``models/123@2``) are dropped.
+    """
+    return name.rpartition("/")[2].partition("@")[0]
+
+
+def endpoint_rname(endpoint_id: str, project: Optional[str] = None, region: str = REGION) -> str:
+    """Return the full resource name of an endpoint ID (default: our project number)."""
+    return f"projects/{project or resource_project()}/locations/{region}/endpoints/{endpoint_id}"
+
+
+def model_rname(model_id: str, project: Optional[str] = None, region: str = REGION) -> str:
+    """Return the full resource name of a model ID (default: our project number)."""
+    return f"projects/{project or resource_project()}/locations/{region}/models/{model_id}"
+
+
+@lru_cache(maxsize=None)
+def resource_project(project_id: str = PROJECT_ID) -> str:
+    """Return the project segment of Vertex AI resource names.
+
+    GCP_PROJECT_NUMBER wins if set. Otherwise the project ID is returned:
+    resource names and the REST API accept either, so no lookup is needed.
+    """
+    if project_id == PROJECT_ID and os.getenv("GCP_PROJECT_NUMBER"):
+        return os.environ["GCP_PROJECT_NUMBER"]
+    return project_id
+
+
+@lru_cache(maxsize=None)
+def get_credentials() -> Credentials:
+    """Resolve Application Default Credentials once per process."""
+    import google.auth
+
+    credentials, _ = google.auth.default(
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    return credentials
+
+
+@lru_cache(maxsize=None)
+def init_vertex_ai(project_id: str = PROJECT_ID, region: str = REGION) -> None:
+    """Initialise the Vertex AI SDK with the cached credentials (once)."""
+    from google.cloud import aiplatform
+
+    aiplatform.init(project=project_id, location=region, credentials=get_credentials())
+
+
+@lru_cache(maxsize=None)
+def get_endpoint(endpoint_id: str) -> aiplatform.Endpoint:
+    """Return the endpoint handle for an ID, fetched once per process."""
+    from google.cloud import aiplatform
+
+    init_vertex_ai()
+    return aiplatform.Endpoint(endpoint_name=endpoint_rname(endpoint_id))
+
+
+@lru_cache(maxsize=None)
+def get_model(model_id: str) -> aiplatform.Model:
+    """Return the model handle for an ID, fetched once per process."""
+    from google.cloud import aiplatform
+
+    init_vertex_ai()
+    return aiplatform.Model(model_name=model_rname(model_id))
+
+
+@lru_cache(maxsize=None)
+def list_endpoints(
+    filter: Optional[str] = None, order_by: Optional[str] = None
+) -> Tuple[aiplatform.Endpoint, ...]:
+    """List endpoints once per distinct filter/order."""
+    from google.cloud import aiplatform
+
+    init_vertex_ai()
+    return tuple(DEFAULT_RETRY(aiplatform.Endpoint.list)(filter=filter, order_by=order_by))
+
+
+@lru_cache(maxsize=None)
+def list_models(
+    filter: Optional[str] = None, order_by: Optional[str] = None
+) -> Tuple[aiplatform.Model, ...]:
+    """List models once per distinct filter/order."""
+    from google.cloud import aiplatform
+
+    init_vertex_ai()
+    return tuple(DEFAULT_RETRY(aiplatform.Model.list)(filter=filter, order_by=order_by))
+
+
+def _grpc_transport(transport_cls, api_endpoint: str):
+    """Build a gRPC transport on a gzip-compressed channel with keepalive."""
+    import grpc
+
+    channel = transport_cls.create_channel(
+        api_endpoint,
+        credentials=get_credentials(),
+        compression=grpc.Compression.Gzip,
+        options=GRPC_OPTIONS,
+    )
+    return transport_cls(host=api_endpoint, channel=channel)
+
+
+@lru_cache(maxsize=None)
+def endpoint_service_client() -> EndpointServiceClient:
+    """Return the regional EndpointServiceClient, created once."""
+    from google.cloud.aiplatform_v1 import EndpointServiceClient
+    from google.cloud.aiplatform_v1.services.endpoint_service.transports import (
+        EndpointServiceGrpcTransport,
+    )
+
+    return EndpointServiceClient(
+        transport=_grpc_transport(EndpointServiceGrpcTransport, API_ENDPOINT)
+    )
+
+
+@lru_cache(maxsize=None)
+def model_service_client() -> ModelServiceClient:
+    """Return the regional ModelServiceClient, created once."""
+    from google.cloud.aiplatform_v1 import ModelServiceClient
+    from google.cloud.aiplatform_v1.services.model_service.transports import (
+        ModelServiceGrpcTransport,
+    )
+
+    return ModelServiceClient(
+        transport=_grpc_transport(ModelServiceGrpcTransport, API_ENDPOINT)
+    )
+
+
+@lru_cache(maxsize=None)
+def pipeline_client(region: str = REGION) -> PipelineServiceClient:
+    """Return the PipelineServiceClient for a region, created once."""
+    from google.cloud.aiplatform_v1 import PipelineServiceClient
+    from google.cloud.aiplatform_v1.services.pipeline_service.transports import (
+        PipelineServiceGrpcTransport,
+    )
+
+    return PipelineServiceClient(
+        transport=_grpc_transport(
+            PipelineServiceGrpcTransport, f"{region}-aiplatform.googleapis.com"
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def storage_client() -> storage.Client:
+    """Return the Cloud Storage client, created once."""
+    from google.cloud import storage
+
+    return storage.Client(project=PROJECT_ID, credentials=get_credentials())
+
+
+def split_without(traffic_split: Dict[str, int], removed_ids: Iterable[str]) -> Dict[str, int]:
+    """Return ``traffic_split`` without ``removed_ids``, rescaled to 100.
+
+    The rounding remainder goes to the largest remaining share; an empty
+    split is returned when no remaining model received traffic.
+    """
+    removed = set(removed_ids)
+    remaining = {key: value for key, value in traffic_split.items() if key not in removed}
+    total = sum(remaining.values())
+    if not total:
+        return {}
+    rescaled = {key: value * 100 // total for key, value in remaining.items()}
+    largest = max(remaining, key=remaining.get)
+    rescaled[largest] += 100 - sum(rescaled.values())
+    return rescaled
+
+
+def start_undeploy(endpoint: aiplatform.Endpoint, deployed_model_ids: Iterable[str]) -> list:
+    """Start an UndeployModel operation for each of ``deployed_model_ids``.
+
+    A model can only be undeployed once it receives no traffic, so its share
+    is first redistributed over the models that stay (one UpdateEndpoint);
+    the operations then run in parallel.
+
+    Returns:
+        (deployed_model, operation) pairs, to wait on with operation.result()
+    """
+    client = endpoint.api_client
+    resource = endpoint.gca_resource
+    ids = set(deployed_model_ids)
+    targets = [model for model in resource.deployed_models if model.id in ids]
+    if not targets:
+        return []
+
+    traffic_split = dict(resource.traffic_split)
+    new_split = split_without(traffic_split, ids)
+    if new_split != traffic_split:
+        updated = type(resource)(resource)
+        updated.traffic_split = new_split
+        client.update_endpoint(endpoint=updated, update_mask={"paths": ["traffic_split"]})
+
+    return [
+        (
+            deployed_model,
+            client.undeploy_model(
+                endpoint=endpoint.resource_name, deployed_model_id=deployed_model.id
+            ),
+        )
+        for deployed_model in targets
+    ]
+
+
+def start_undeploy_all(endpoint: aiplatform.Endpoint) -> list:
+    """Start an UndeployModel operation for every model on the endpoint.
+
+    Returns:
+        (deployed_model, operation) pairs, to wait on with operation.result()
+    """
+    return start_undeploy(
+        endpoint, [deployed_model.id for deployed_model in endpoint.gca_resource.deployed_models]
+    )
+
+
+def gcs_uri_exists(uri: str) -> bool:
+    """Return True if ``uri`` (gs://bucket/path) is an object or a non-empty prefix."""
+    bucket, _, prefix = uri[len("gs://"):].partition("/")
+    blobs = storage_client().list_blobs(bucket, prefix=prefix, max_results=1, fields="items(name)")
+    return any(True for _ in blobs)
+
+
+def gcs_uri_marker(uri: str, missing: str = "❌") -> str:
+    """Return a status marker for an artifact URI, for reports.
+
+    "✅" if it exists in GCS, ``missing`` if not, "?" when the check itself
+    fails (permissions, transient error), and "" for a non-GCS URI, which
+    is not probed.
+    """
+    if not uri.startswith("gs://"):
+        return ""
+    try:
+        return "✅" if gcs_uri_exists(uri) else missing
+    except Exception:
+        return "?"
+
+
+def list_recent_endpoints(limit: int, fields: Iterable[str]) -> List[Endpoint]:
+    """Return the ``limit`` newest endpoint protos with only ``fields`` populated.
+
+    The page size matches ``limit`` so a single ListEndpoints page is fetched.
+    """
+    pager = endpoint_service_client().list_endpoints(
+        request={
+            "parent": PARENT,
+            "page_size": limit,
+            "order_by": "create_time desc",
+            "read_mask": field_mask_pb2.FieldMask(paths=list(fields)),
+        },
+        retry=DEFAULT_RETRY,
+    )
+    return list(islice(pager, limit))
+
+
+def get_endpoint_lite(endpoint_id: str, fields: Iterable[str]) -> Optional[Endpoint]:
+    """Return an endpoint proto with only ``fields`` populated.
+
+    GetEndpoint has no read mask in v1, so the endpoint is fetched through
+    ListEndpoints filtered on its ID. Returns None if it does not exist.
+    """
+    pager = endpoint_service_client().list_endpoints(
+        request={
+            "parent": PARENT,
+            "filter": f'endpoint="{endpoint_id}"',
+            "page_size": 1,
+            "read_mask": field_mask_pb2.FieldMask(paths=list(fields)),
+        },
+        retry=DEFAULT_RETRY,
+    )
+    return next(iter(pager), None)
+
+
+def list_recent_models(limit: int, fields: Iterable[str]) -> List[Model]:
+    """Return the ``limit`` newest model protos with only ``fields`` populated.
+
+    The page size matches ``limit`` so a single ListModels page is fetched.
+    """
+    pager = model_service_client().list_models(
+        request={
+            "parent": PARENT,
+            "page_size": limit,
+            "order_by": "create_time desc",
+            "read_mask": field_mask_pb2.FieldMask(paths=list(fields)),
+        },
+        retry=DEFAULT_RETRY,
+    )
+    return list(islice(pager, limit))
+
+
+def get_pipeline_job_lite(
+    job_id: Optional[str] = None,
+    fields: Iterable[str] = PIPELINE_JOB_LITE_FIELDS,
+    region: str = REGION,
+) -> Optional[PipelineJob]:
+    """Return a pipeline job proto with only ``fields`` populated.
+
+    GetPipelineJob has no read mask in v1, so the job is fetched through
+    ListPipelineJobs filtered on its ID. Without ``job_id`` the most recent
+    job is returned. Returns None if no job matches.
+    """
+    request = {
+        "parent": f"projects/{PROJECT_ID}/locations/{region}",
+        "page_size": 1,
+        "read_mask": field_mask_pb2.FieldMask(paths=list(fields)),
+    }
+    if job_id:
+        request["filter"] = f'pipeline_job_user_id="{job_id}"'
+    else:
+        request["order_by"] = "create_time desc"
+    pager = pipeline_client(region).list_pipeline_jobs(request=request, retry=DEFAULT_RETRY)
+    return next(iter(pager), None)
+
+
+async def gather_in_threads(
+    func: Callable[[Any], Any], items: Iterable[Any], limit: int = MAX_CONCURRENT_REQUESTS
+) -> List[Any]:
+    """Run the blocking ``func(item)`` for every item in worker threads,
+    at most ``limit`` at a time.
+
+    Results come back in the order of ``items``; an exception is returned in
+    place of its result instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await asyncio.to_thread(func, item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
@@ -5,33 +5,45 @@ deployed for a configurable amount of time.
 Usage:
     python scripts/auto_undeploy.py [--max-age-minutes 10] [--poll-interval 60]
 """
+from __future__ import annotations
+
 import argparse
 import os
 import sys
 import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from _env import load_env
+from _gcp_client import resource_project, start_undeploy
 
-from dotenv import load_dotenv
-from google.api_core import exceptions
-from google.cloud import aiplatform
-from google.cloud.aiplatform_v1.types import DeployedModel
+# google.cloud.aiplatform takes seconds to import, so it is only loaded once
+# the arguments are parsed (``--help`` never pays for it).
+if TYPE_CHECKING:
+    from google.cloud import aiplatform
+    from google.cloud.aiplatform_v1.types import DeployedModel
 
-load_dotenv()
+load_env()
 
 # Environment driven defaults
 DEFAULT_MAX_AGE_MINUTES = int(os.getenv("AUTO_UNDEPLOY_MAX_AGE_MINUTES", "10"))
 DEFAULT_POLL_SECONDS = int(os.getenv("AUTO_UNDEPLOY_POLL_SECONDS", "60"))
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-PROJECT_NUMBER = os.getenv("GCP_PROJECT_NUMBER", "432566588992")
 REGION = os.getenv("GCP_REGION", "europe-west2")
 ENDPOINT_ID = os.getenv("GCP_ENDPOINT_ID", "5724492940806455296")
 
 ENDPOINT_RESOURCE_NAME = (
-    f"projects/{PROJECT_NUMBER}/locations/{REGION}/endpoints/{ENDPOINT_ID}"
+    f"projects/{resource_project()}/locations/{REGION}/endpoints/{ENDPOINT_ID}"
 )
 
+_UTC = timezone.utc
+
+# Shortest wait between idle checks before backing off towards the poll interval.
+MIN_IDLE_SECONDS = 30
+# Upper bound when waiting on a single undeploy operation.
+UNDEPLOY_TIMEOUT_SECONDS = 1800
+
 
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
@@ -70,29 +82,46 @@ def parse_args() -> argparse.Namespace:
 
 def init_vertex_ai() -> None:
     """Initialise the Vertex AI client."""
+    from google.cloud import aiplatform
+
     aiplatform.init(project=PROJECT_ID, location=REGION)
 
 
 def get_endpoint() -> aiplatform.Endpoint:
     """Return a fresh handle to the Vertex AI endpoint."""
+    from google.cloud import aiplatform
+
     return aiplatform.Endpoint(endpoint_name=ENDPOINT_RESOURCE_NAME)
 
 
+def refresh_endpoint(endpoint: aiplatform.Endpoint) -> None:
+    """Re-read the endpoint state in place instead of building a new handle."""
+    endpoint._sync_gca_resource()
+
+
+def next_backoff(current: Optional[float], poll: int) -> float:
+    """Return the next idle wait, doubling from 30 seconds up to ``poll``."""
+    if current is None:
+        return min(MIN_IDLE_SECONDS, poll)
+    return min(current * 2, poll)
+
+
 def to_datetime(value) -> Optional[datetime]:
     """Convert a timestamp-like value to a timezone aware datetime."""
     if value is None:
         return None
-    try:
-        # Protobuf Timestamp has ToDatetime method.
-        return value.ToDatetime(tzinfo=timezone.utc)
-    except AttributeError:
-        pass
+    if isinstance(value, datetime):
+        # proto-plus already exposes Timestamp fields as aware datetimes.
+        return value if value.tzinfo else value.replace(tzinfo=_UTC)
+    if hasattr(value, "ToDatetime"):
+        # Raw protobuf Timestamp.
+        return value.ToDatetime(tzinfo=_UTC)
     if isinstance(value, str):
         # Ensure RFC3339 strings become timezone aware.
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
         try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(
-                timezone.utc
-            )
+            return datetime.fromisoformat(value).astimezone(_UTC)
         except ValueError:
             return None
     return None
@@ -112,13 +141,59 @@ def format_timedelta(delta: timedelta) -> str:
     return " ".join(parts)
 
 
+def emit(lines: List[str]) -> None:
+    """Write a block of status lines with a single write and flush."""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+
 def fetch_deployed_models(endpoint: aiplatform.Endpoint) -> List[DeployedModel]:
     """Return the list of deployed models for the endpoint."""
     return list(endpoint.gca_resource.deployed_models or [])
 
 
+def undeploy_models(
+    endpoint: aiplatform.Endpoint, models: List[DeployedModel]
+) -> bool:
+    """Start every undeploy operation first, then wait for all of them.
+
+    The models' traffic is moved to the remaining ones beforehand (see
+    ``start_undeploy``).
+
+    Returns:
+        True if every model was undeployed
+    """
+    from google.api_core import exceptions
+
+    try:
+        operations = start_undeploy(endpoint, [model.id for model in models])
+    except exceptions.GoogleAPICallError as error:
+        print(f"Failed to undeploy {', '.join(model.id for model in models)}: {error}")
+        return False
+
+    succeeded = True
+    for model, operation in operations:
+        try:
+            operation.result(timeout=UNDEPLOY_TIMEOUT_SECONDS)
+            print(f"Undeployed {model.display_name or model.id} successfully.")
+        except exceptions.GoogleAPICallError as error:
+            print(f"Failed to undeploy {model.id}: {error}")
+            succeeded = False
+        except TimeoutError:
+            print(
+                f"Undeploy of {model.id} still running after "
+                f"{UNDEPLOY_TIMEOUT_SECONDS} seconds."
+            )
+            succeeded = False
+    return succeeded
+
+
 def main() -> None:
     args = parse_args()
+
+    from google.api_core import exceptions
+
     max_age = timedelta(minutes=args.max_age_minutes)
     poll = max(args.poll_interval, 10)
 
@@ -129,33 +204,52 @@ def main() -> None:
         print(f"Failed to initialise endpoint: {error}")
         sys.exit(1)
 
-    print("=" * 70)
-    print("Auto-undeploy monitor started")
-    print(f"Project: {PROJECT_ID}")
-    print(f"Endpoint ID: {ENDPOINT_ID}")
-    print(f"Maximum age: {args.max_age_minutes} minutes")
+    banner = [
+        "=" * 70,
+        "Auto-undeploy monitor started",
+        f"Project: {PROJECT_ID}",
+        f"Endpoint ID: {ENDPOINT_ID}",
+        f"Maximum age: {args.max_age_minutes} minutes",
+    ]
     if args.dry_run:
-        print("Running in dry-run mode (no undeploy calls will be made)")
-    print("=" * 70)
+        banner.append("Running in dry-run mode (no undeploy calls will be made)")
+    banner.append("=" * 70)
+    emit(banner)
+
+    # The handle above already carries fresh state, so the first pass skips
+    # the refresh RPC.
+    needs_refresh = False
+    idle_wait: Optional[float] = None
+    # create_time never changes for a deployment, so parse it once per model.
+    created_at_cache: Dict[str, Optional[datetime]] = {}
 
     try:
         while True:
-            try:
-                endpoint = get_endpoint()
-            except exceptions.GoogleAPICallError as error:
-                print(f"Failed to fetch endpoint state: {error}")
-                print(f"Retrying in {poll} seconds...")
-                time.sleep(poll)
-                continue
+            # Status lines for this poll, written out as one block.
+            lines: List[str] = []
+
+            if needs_refresh:
+                try:
+                    refresh_endpoint(endpoint)
+                except exceptions.GoogleAPICallError as error:
+                    lines.append(f"Failed to fetch endpoint state: {error}")
+                    lines.append(f"Retrying in {poll} seconds...")
+                    emit(lines)
+                    time.sleep(poll)
+                    continue
+            needs_refresh = True
 
             deployed_models = fetch_deployed_models(endpoint)
 
             if not deployed_models:
-                print("No models currently deployed.")
+                lines.append("No models currently deployed.")
                 if args.exit_if_empty:
+                    emit(lines)
                     break
-                print(f"Waiting {poll} seconds before checking again...")
-                time.sleep(poll)
+                idle_wait = next_backoff(idle_wait, poll)
+                lines.append(f"Waiting {int(idle_wait)} seconds before checking again...")
+                emit(lines)
+                time.sleep(idle_wait)
                 continue
 
             now = datetime.now(timezone.utc)
@@ -163,9 +257,11 @@ def main() -> None:
             next_due_in: Optional[timedelta] = None
 
             for model in deployed_models:
-                created_at = to_datetime(model.create_time)
+                if model.id not in created_at_cache:
+                    created_at_cache[model.id] = to_datetime(model.create_time)
+                created_at = created_at_cache[model.id]
                 if created_at is None:
-                    print(f"Skipping model {model.id}: missing create_time.")
+                    lines.append(f"Skipping model {model.id}: missing create_time.")
                     continue
                 age = now - created_at
 
@@ -175,42 +271,61 @@ def main() -> None:
                 )
 
                 if age >= max_age:
-                    print(f"{status_line} exceeds limit -> scheduling undeploy")
+                    lines.append(f"{status_line} exceeds limit -> scheduling undeploy")
                     overdue_models.append(model)
                 else:
                     remaining = max_age - age
-                    print(f"{status_line} - {format_timedelta(remaining)} remaining")
+                    lines.append(f"{status_line} - {format_timedelta(remaining)} remaining")
                     if next_due_in is None or remaining < next_due_in:
                         next_due_in = remaining
 
+            # Forget deployments that are no longer on the endpoint.
+            deployed_ids = {model.id for model in deployed_models}
+            for model_id in created_at_cache.keys() - deployed_ids:
+                del created_at_cache[model_id]
+
             if overdue_models:
                 for model in overdue_models:
-                    print(f"Undeploying model {model.display_name or model.id}...")
-                    if args.dry_run:
-                        print("Dry-run: skipping call.")
-                        continue
-                    try:
-                        endpoint.undeploy(deployed_model_id=model.id)
-                        print("Undeployed successfully.")
-                    except exceptions.GoogleAPICallError as error:
-                        print(f"Failed to undeploy {model.id}: {error}")
-
-                # Allow time for Vertex AI to update state before next check.
-                time.sleep(15)
+                    lines.append(f"Undeploying model {model.display_name or model.id}...")
+                if args.dry_run:
+                    lines.append("Dry-run: skipping calls.")
+                    emit(lines)
+                    time.sleep(poll)
+                    continue
+
+                emit(lines)
+                if undeploy_models(endpoint, overdue_models):
+                    idle_wait = None
+                    continue
+                # Back off before retrying so a persistent failure does not
+                # turn into a tight refresh/undeploy loop
+                idle_wait = next_backoff(idle_wait, poll)
+                emit([f"Retrying in {int(idle_wait)} seconds..."])
+                time.sleep(idle_wait)
                 continue
 
             if next_due_in is None:
                 # No valid timestamps encountered.
-                print(f"Waiting {poll} seconds before next check...")
-                time.sleep(poll)
+                idle_wait = next_backoff(idle_wait, poll)
+                lines.append(f"Waiting {int(idle_wait)} seconds before next check...")
+                emit(lines)
+                time.sleep(idle_wait)
                 continue
 
+            idle_wait = None
             sleep_for = min(next_due_in.total_seconds(), poll)
             if sleep_for <= 0:
                 # A model should already be due, loop will catch it next iteration.
+                emit(lines)
                 continue
 
-            print(f"Waiting {int(sleep_for)} seconds for the next check...")
+            # Waking up exactly when the next model falls due: nothing but an
+            # external actor can have changed the deployed models meanwhile, so
+            # the cached state is reused instead of paying another GetEndpoint.
+            needs_refresh = sleep_for < next_due_in.total_seconds()
+
+            lines.append(f"Waiting {int(sleep_for)} seconds for the next check...")
+            emit(lines)
             time.sleep(sleep_for)
 
     except KeyboardInterrupt:
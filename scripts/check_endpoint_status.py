@@ -3,9 +3,10 @@ Vérifier le statut détaillé de l'endpoint et des modèles déployés.
 """
 import os
 from google.cloud import aiplatform
-from dotenv import load_dotenv
+from _env import load_env
+from _gcp_client import endpoint_rname
 
-load_dotenv()
+load_env()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
 REGION = os.getenv("GCP_REGION", "europe-west2")
@@ -19,7 +20,7 @@ print(f"{'='*80}\n")
 
 try:
     # Charger l'endpoint
-    endpoint = aiplatform.Endpoint(f"projects/432566588992/locations/{REGION}/endpoints/{ENDPOINT_ID}")
+    endpoint = aiplatform.Endpoint(endpoint_rname(ENDPOINT_ID, region=REGION))
     
     print(f"📍 Endpoint: {endpoint.display_name}")
     print(f"   ID: {ENDPOINT_ID}")
@@ -1,81 +1,182 @@
 """
 Vérifier tous les IDs du projet.
+
+Usage:
+    python scripts/check_id.py [--id 3852567797448048640] [--verbose]
 """
+from __future__ import annotations
+
 import os
-from google.cloud import aiplatform
-from dotenv import load_dotenv
+import argparse
+from typing import TYPE_CHECKING
+from _env import load_env
+from _gcp_client import DEFAULT_RETRY, rid
+
+# Import lourd (gRPC, protobuf): chargé seulement après le parsing des arguments
+if TYPE_CHECKING:
+    from google.cloud import aiplatform
 
-load_dotenv()
+load_env()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
 REGION = os.getenv("GCP_REGION", "europe-west2")
+TARGET_ID = "3852567797448048640"
+
+_endpoints = None
+_models = None
+
+
+def list_endpoints() -> list:
+    """Lister les endpoints une seule fois et réutiliser le résultat."""
+    from google.cloud import aiplatform
+
+    global _endpoints
+    if _endpoints is None:
+        _endpoints = list(DEFAULT_RETRY(aiplatform.Endpoint.list)())
+    return _endpoints
+
+
+def list_models() -> list:
+    """Lister les modèles une seule fois (du plus récent au plus ancien)."""
+    from google.cloud import aiplatform
+
+    global _models
+    if _models is None:
+        _models = list(DEFAULT_RETRY(aiplatform.Model.list)(order_by="create_time desc"))
+    return _models
+
+
+def print_endpoint(endpoint: aiplatform.Endpoint) -> None:
+    """Afficher un endpoint trouvé et ses modèles déployés."""
+    endpoint_id = rid(endpoint.name)
+    print(f"Endpoint: {endpoint.display_name}")
+    print(f"  ID: {endpoint_id}")
+    print(f"  ✅ TROUVÉ! C'est cet endpoint!")
+    print(f"  URL: https://console.cloud.google.com/vertex-ai/online-prediction/endpoints/{endpoint_id}?project={PROJECT_ID}")
+
+    # Vérifier les modèles déployés
+    if endpoint.gca_resource.deployed_models:
+        print(f"  Modèles déployés: {len(endpoint.gca_resource.deployed_models)}")
+        for dm in endpoint.gca_resource.deployed_models:
+            print(f"    - {dm.display_name}")
+    else:
+        print(f"  Status: Aucun modèle déployé")
+    print()
+
+
+def print_model(model: aiplatform.Model) -> None:
+    """Afficher un modèle trouvé."""
+    model_id = rid(model.name)
+    print(f"Modèle: {model.display_name}")
+    print(f"  ID: {model_id}")
+    print(f"  ✅ TROUVÉ! C'est ce modèle!")
+    print(f"  URL: https://console.cloud.google.com/vertex-ai/models/{model_id}/versions?project={PROJECT_ID}")
+    print()
+
+
+def find_by_get(target_id: str) -> bool:
+    """Chercher l'ID avec un GetEndpoint puis un GetModel direct.
+
+    Returns:
+        True si la réponse est certaine (trouvé, ou NotFound des deux côtés)
+    """
+    from google.api_core import exceptions
+    from google.cloud import aiplatform
+
+    found = False
+    failed = False
+
+    print("📍 Vérification des Endpoints:\n")
+    try:
+        print_endpoint(aiplatform.Endpoint(endpoint_name=target_id))
+        found = True
+    except exceptions.NotFound:
+        print("  Aucun endpoint avec cet ID\n")
+    except Exception as e:
+        print(f"Erreur: {e}\n")
+        failed = True
+
+    print("📦 Vérification des Modèles:\n")
+    try:
+        print_model(aiplatform.Model(model_name=target_id))
+        found = True
+    except exceptions.NotFound:
+        print("  Aucun modèle avec cet ID\n")
+    except Exception as e:
+        print(f"Erreur: {e}\n")
+        failed = True
+
+    return found or not failed
+
+
+def find_by_list(target_id: str) -> None:
+    """Parcourir tous les endpoints et modèles (repli si les Get échouent)."""
+    print("🔎 Recherche dans la liste complète des ressources:\n")
+    try:
+        for endpoint in list_endpoints():
+            if rid(endpoint.name) == target_id:
+                print_endpoint(endpoint)
+    except Exception as e:
+        print(f"Erreur: {e}\n")
+
+    try:
+        for model in list_models():
+            if rid(model.name) == target_id:
+                print_model(model)
+    except Exception as e:
+        print(f"Erreur: {e}\n")
+
+
+def print_summary() -> None:
+    """Afficher le récapitulatif des endpoints et modèles du projet."""
+    print(f"{'='*80}")
+    print("📋 RÉCAPITULATIF DE VOS RESSOURCES:")
+    print(f"{'='*80}\n")
+
+    print("Endpoints actifs:")
+    try:
+        for endpoint in list_endpoints():
+            endpoint_id = rid(endpoint.name)
+            print(f"  - {endpoint.display_name} (ID: {endpoint_id})")
+    except Exception as e:
+        print(f"  Erreur: {e}")
+
+    print("\nModèles enregistrés:")
+    try:
+        for model in list_models()[:3]:
+            model_id = rid(model.name)
+            print(f"  - {model.display_name} (ID: {model_id})")
+    except Exception as e:
+        print(f"  Erreur: {e}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifier à quelle ressource correspond un ID")
+    parser.add_argument("--id", default=TARGET_ID, help="ID à vérifier (default: %(default)s)")
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Afficher aussi le récapitulatif de toutes les ressources"
+    )
+    args = parser.parse_args()
+
+    from google.cloud import aiplatform
+
+    aiplatform.init(project=PROJECT_ID, location=REGION)
+
+    print(f"\n{'='*80}")
+    print(f"🔍 VÉRIFICATION DE L'ID: {args.id}")
+    print(f"{'='*80}\n")
+
+    if not find_by_get(args.id):
+        find_by_list(args.id)
+
+    if args.verbose:
+        print_summary()
+
+    print(f"{'='*80}\n")
+
 
-aiplatform.init(project=PROJECT_ID, location=REGION)
-
-print(f"\n{'='*80}")
-print("🔍 VÉRIFICATION DE L'ID: 3852567797448048640")
-print(f"{'='*80}\n")
-
-# Vérifier si c'est un endpoint
-print("📍 Vérification des Endpoints:\n")
-try:
-    endpoints = aiplatform.Endpoint.list()
-    for endpoint in endpoints:
-        endpoint_id = endpoint.name.split('/')[-1]
-        print(f"Endpoint: {endpoint.display_name}")
-        print(f"  ID: {endpoint_id}")
-        
-        if endpoint_id == "3852567797448048640":
-            print(f"  ✅ TROUVÉ! C'est cet endpoint!")
-            print(f"  URL: https://console.cloud.google.com/vertex-ai/online-prediction/endpoints/{endpoint_id}?project={PROJECT_ID}")
-            
-            # Vérifier les modèles déployés
-            if endpoint.gca_resource.deployed_models:
-                print(f"  Modèles déployés: {len(endpoint.gca_resource.deployed_models)}")
-                for dm in endpoint.gca_resource.deployed_models:
-                    print(f"    - {dm.display_name}")
-            else:
-                print(f"  Status: Aucun modèle déployé")
-        print()
-except Exception as e:
-    print(f"Erreur: {e}\n")
-
-# Vérifier si c'est un modèle
-print("📦 Vérification des Modèles:\n")
-try:
-    models = aiplatform.Model.list()
-    for model in models:
-        model_id = model.name.split('/')[-1].split('@')[0]
-        print(f"Modèle: {model.display_name}")
-        print(f"  ID: {model_id}")
-        
-        if model_id == "3852567797448048640":
-            print(f"  ✅ TROUVÉ! C'est ce modèle!")
-            print(f"  URL: https://console.cloud.google.com/vertex-ai/models/{model_id}/versions?project={PROJECT_ID}")
-        print()
-except Exception as e:
-    print(f"Erreur: {e}\n")
-
-print(f"{'='*80}")
-print("📋 RÉCAPITULATIF DE VOS RESSOURCES:")
-print(f"{'='*80}\n")
-
-print("Endpoints actifs:")
-try:
-    endpoints = aiplatform.Endpoint.list()
-    for endpoint in endpoints:
-        endpoint_id = endpoint.name.split('/')[-1]
-        print(f"  - {endpoint.display_name} (ID: {endpoint_id})")
-except:
-    pass
-
-print("\nModèles enregistrés:")
-try:
-    models = aiplatform.Model.list(order_by="create_time desc")
-    for model in models[:3]:
-        model_id = model.name.split('/')[-1].split('@')[0]
-        print(f"  - {model.display_name} (ID: {model_id})")
-except:
-    pass
-
-print(f"\n{'='*80}\n")
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,13 @@
 Script to check the status of running pipelines in Vertex AI.
 """
 import sys
+from itertools import islice
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from google.cloud import aiplatform
 import logging
 
 from src.constants import GCP_PROJECT_ID, GCP_REGION, PIPELINE_NAME
@@ -23,54 +23,55 @@ def check_pipeline_status(limit: int = 5):
     Args:
         limit: Number of recent pipelines to display
     """
-    logger.info(f"Checking pipeline status for project: {GCP_PROJECT_ID}")
+    # Imported here so that `--help` does not load the Vertex AI client
+    from google.cloud.aiplatform_v1.types import PipelineState
+    from _gcp_client import DEFAULT_RETRY, pipeline_client
+    
+    state_labels = {
+        PipelineState.PIPELINE_STATE_SUCCEEDED: "✅ Status: Completed successfully",
+        PipelineState.PIPELINE_STATE_RUNNING: "⏳ Status: Running...",
+        PipelineState.PIPELINE_STATE_FAILED: "❌ Status: Failed",
+        PipelineState.PIPELINE_STATE_PENDING: "🕐 Status: Pending...",
+    }
     
-    # Initialize Vertex AI
-    aiplatform.init(project=GCP_PROJECT_ID, location=GCP_REGION)
+    logger.info(f"Checking pipeline status for project: {GCP_PROJECT_ID}")
     
-    # List pipeline jobs
-    jobs = aiplatform.PipelineJob.list(
-        filter=f'display_name:"{PIPELINE_NAME}*"',
-        order_by="create_time desc",
+    # Ask the server for exactly `limit` jobs; stopping after them means only
+    # the first page is ever fetched, instead of every run in the project.
+    pager = pipeline_client(GCP_REGION).list_pipeline_jobs(
+        request={
+            "parent": f"projects/{GCP_PROJECT_ID}/locations/{GCP_REGION}",
+            "filter": f'display_name:"{PIPELINE_NAME}*"',
+            "order_by": "create_time desc",
+            "page_size": limit,
+        },
+        retry=DEFAULT_RETRY,
     )
+    jobs = list(islice(pager, limit))
     
     logger.info(f"\n📊 Recent Pipeline Runs (last {limit}):\n")
     logger.info("=" * 100)
     
-    count = 0
     for job in jobs:
-        if count >= limit:
-            break
-            
         logger.info(f"\nPipeline: {job.display_name}")
         logger.info(f"  State: {job.state.name}")
         logger.info(f"  Created: {job.create_time}")
         logger.info(f"  Updated: {job.update_time}")
-        logger.info(f"  Resource Name: {job.resource_name}")
+        logger.info(f"  Resource Name: {job.name}")
         
-        if job.state.name == "PIPELINE_STATE_SUCCEEDED":
-            logger.info(f"  ✅ Status: Completed successfully")
-        elif job.state.name == "PIPELINE_STATE_RUNNING":
-            logger.info(f"  ⏳ Status: Running...")
-        elif job.state.name == "PIPELINE_STATE_FAILED":
-            logger.info(f"  ❌ Status: Failed")
-            try:
-                if hasattr(job, 'error') and job.error:
-                    logger.info(f"  Error: {job.error}")
-            except:
-                pass
-        elif job.state.name == "PIPELINE_STATE_PENDING":
-            logger.info(f"  🕐 Status: Pending...")
+        label = state_labels.get(job.state)
+        if label:
+            logger.info(f"  {label}")
+        if job.state == PipelineState.PIPELINE_STATE_FAILED and job.error.message:
+            logger.info(f"  Error: {job.error.message}")
         
         # Console link
-        job_id = job.resource_name.split("/")[-1]
+        job_id = job.name.split("/")[-1]
         console_url = f"https://console.cloud.google.com/vertex-ai/pipelines/runs/{job_id}?project={GCP_PROJECT_ID}"
         logger.info(f"  🔗 Console: {console_url}")
         logger.info("-" * 100)
-        
-        count += 1
     
-    if count == 0:
+    if not jobs:
         logger.info("No pipeline runs found.")
     
     return jobs
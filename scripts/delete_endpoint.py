@@ -5,39 +5,53 @@ WARNING: This will permanently delete the endpoint.
 You will need to recreate it to deploy models again.
 
 Usage:
-    python scripts/delete_endpoint.py
+    python scripts/delete_endpoint.py [--endpoints ID1,ID2,...]
 """
 import os
-from google.cloud import aiplatform
-from dotenv import load_dotenv
+import argparse
+import asyncio
 
-load_dotenv()
+from _gcp_client import gather_in_threads, get_endpoint, start_undeploy_all
 
 # Configuration
-PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-PROJECT_NUMBER = os.getenv("GCP_PROJECT_NUMBER", "432566588992")
-REGION = os.getenv("GCP_REGION", "europe-west2")
 ENDPOINT_ID = os.getenv("GCP_ENDPOINT_ID", "5724492940806455296")
 
-def delete_endpoint():
-    """Completely delete the endpoint."""
+def teardown_endpoint(endpoint):
+    """Undeploy every model at once, then delete the endpoint.
+    
+    Unlike endpoint.delete(force=True), which undeploys the models one after
+    the other, all UndeployModel operations are started before waiting on
+    any of them.
+    """
+    operations = start_undeploy_all(endpoint)
+    if operations:
+        print(f"   Undeploying {len(operations)} model(s)...")
+        for _, operation in operations:
+            operation.result()
+    
+    endpoint.api_client.delete_endpoint(name=endpoint.resource_name).result()
+
+def delete_endpoints(endpoint_ids):
+    """Completely delete the endpoints, all at the same time."""
     print("=" * 70)
     print("⚠️  WARNING: ENDPOINT DELETION")
     print("=" * 70)
     
-    # Initialize Vertex AI
-    aiplatform.init(project=PROJECT_ID, location=REGION)
-    
-    # Get endpoint
-    endpoint = aiplatform.Endpoint(
-        endpoint_name=f"projects/{PROJECT_NUMBER}/locations/{REGION}/endpoints/{ENDPOINT_ID}"
-    )
+    # Get endpoints
+    endpoints = []
+    for endpoint_id, endpoint in zip(endpoint_ids, asyncio.run(gather_in_threads(get_endpoint, endpoint_ids))):
+        if isinstance(endpoint, Exception):
+            print(f"\n❌ Endpoint {endpoint_id}: {endpoint}")
+            continue
+        print(f"\n📍 Endpoint: {endpoint.display_name}")
+        print(f"   ID: {endpoint_id}")
+        endpoints.append((endpoint_id, endpoint))
     
-    print(f"\n📍 Endpoint: {endpoint.display_name}")
-    print(f"   ID: {ENDPOINT_ID}")
+    if not endpoints:
+        return
     
     # Confirm deletion
-    print("\n⚠️  This will PERMANENTLY DELETE the endpoint!")
+    print(f"\n⚠️  This will PERMANENTLY DELETE {len(endpoints)} endpoint(s)!")
     print("   You will need to recreate it to deploy models again.")
     
     confirm = input("\n❓ Type 'DELETE' to confirm: ")
@@ -46,15 +60,28 @@ def delete_endpoint():
         print("\n❌ Deletion cancelled")
         return
     
-    print("\n🗑️  Deleting endpoint...")
+    print("\n🗑️  Deleting endpoint(s)...")
+    
+    results = asyncio.run(
+        gather_in_threads(teardown_endpoint, [endpoint for _, endpoint in endpoints])
+    )
+    for (endpoint_id, _), error in zip(endpoints, results):
+        if error is None:
+            print(f"\n✅ Endpoint {endpoint_id} deleted successfully!")
+        else:
+            print(f"\n❌ Error deleting endpoint {endpoint_id}: {error}")
     
-    try:
-        endpoint.delete(force=True)
-        print("\n✅ Endpoint deleted successfully!")
+    if not any(results):
         print("\n💰 All billing stopped")
         print("📝 You can create a new endpoint anytime using scripts/deploy_to_endpoint.py")
-    except Exception as e:
-        print(f"\n❌ Error deleting endpoint: {e}")
 
 if __name__ == "__main__":
-    delete_endpoint()
+    parser = argparse.ArgumentParser(description="Delete Vertex AI endpoints")
+    parser.add_argument(
+        "--endpoints",
+        default=ENDPOINT_ID,
+        help="Comma-separated endpoint IDs (default: GCP_ENDPOINT_ID)"
+    )
+    args = parser.parse_args()
+    
+    delete_endpoints([endpoint_id.strip() for endpoint_id in args.endpoints.split(",") if endpoint_id.strip()])
@@ -8,20 +8,30 @@ This script:
 
 Usage:
     python scripts/deploy_to_endpoint.py --model-id 3561348948692041728
+    python scripts/deploy_to_endpoint.py --model-id 3561348948692041728 --endpoints ep-a,ep-b
 """
-import os
+from __future__ import annotations
+
 import argparse
+import asyncio
 import time
-from google.cloud import aiplatform
-from dotenv import load_dotenv
+from functools import partial
+from typing import TYPE_CHECKING
+from _gcp_client import DEFAULT_RETRY, PROJECT_ID, REGION, gather_in_threads, model_rname, rid
+
+# The SDK takes over a second to import: load it only once there is work to
+# do, so that --help and argument errors return immediately
+if TYPE_CHECKING:
+    from google.cloud import aiplatform
 
-load_dotenv()
+# Longest wait between two polls of the deploy operation
+POLL_MAX_SECONDS = 10
 
 
 def create_endpoint(
     endpoint_name: str,
-    project_id: str = None,
-    region: str = None
+    project_id: str = PROJECT_ID,
+    region: str = REGION
 ) -> aiplatform.Endpoint:
     """
     Create a new Vertex AI endpoint.
@@ -34,10 +44,7 @@ def create_endpoint(
     Returns:
         Created Endpoint object
     """
-    if project_id is None:
-        project_id = os.getenv("GCP_PROJECT_ID")
-    if region is None:
-        region = os.getenv("GCP_REGION", "europe-west2")
+    from google.cloud import aiplatform
     
     aiplatform.init(project=project_id, location=region)
     
@@ -56,11 +63,37 @@ def create_endpoint(
     )
     
     print(f"✅ Endpoint created: {endpoint.resource_name}")
-    print(f"Endpoint ID: {endpoint.name.split('/')[-1]}")
+    print(f"Endpoint ID: {rid(endpoint.name)}")
     
     return endpoint
 
 
+def wait_for_operation(operation, start_time: float) -> None:
+    """
+    Poll a long-running operation until it finishes.
+    
+    Polling starts at 1 second and backs off to POLL_MAX_SECONDS, so a quick
+    deployment is noticed right away without hammering the API during a
+    long one. Raises the operation's error if it failed.
+    
+    Args:
+        operation: google.api_core operation returned by the service client
+        start_time: time.time() when the operation was submitted
+    """
+    interval = 1.0
+    last_report = start_time
+    while not operation.done():
+        now = time.time()
+        if now - last_report >= 60:
+            print(f"   ⏳ Still deploying... {(now - start_time)/60:.0f} min elapsed")
+            last_report = now
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_MAX_SECONDS)
+    
+    # Raises GoogleAPICallError if the deployment failed
+    operation.result()
+
+
 def deploy_model_to_endpoint(
     model_id: str,
     endpoint_name: str = "nutrition-assistant-endpoint",
@@ -69,8 +102,9 @@ def deploy_model_to_endpoint(
     accelerator_count: int = 1,
     min_replica_count: int = 1,
     max_replica_count: int = 1,
-    project_id: str = None,
-    region: str = None
+    project_id: str = PROJECT_ID,
+    region: str = REGION,
+    legacy_sync: bool = False
 ) -> tuple:
     """
     Deploy a model to a Vertex AI endpoint.
@@ -85,14 +119,13 @@ def deploy_model_to_endpoint(
         max_replica_count: Maximum number of replicas
         project_id: GCP project ID
         region: GCP region
+        legacy_sync: Block inside model.deploy(sync=True) instead of polling
+            the deploy operation
         
     Returns:
         Tuple of (endpoint, deployed_model_id)
     """
-    if project_id is None:
-        project_id = os.getenv("GCP_PROJECT_ID")
-    if region is None:
-        region = os.getenv("GCP_REGION", "europe-west2")
+    from google.cloud import aiplatform
     
     aiplatform.init(project=project_id, location=region)
     
@@ -105,14 +138,14 @@ def deploy_model_to_endpoint(
     if "/" in model_id:
         model = aiplatform.Model(model_name=model_id)
     else:
-        model = aiplatform.Model(model_name=f"projects/{project_id}/locations/{region}/models/{model_id}")
+        model = aiplatform.Model(model_name=model_rname(model_id, project_id, region))
     
     print(f"✅ Model loaded: {model.display_name}")
     print(f"   Resource: {model.resource_name}")
     
     # Check if endpoint exists
     print(f"\n🔍 Checking for existing endpoint: {endpoint_name}")
-    existing_endpoints = aiplatform.Endpoint.list(
+    existing_endpoints = DEFAULT_RETRY(aiplatform.Endpoint.list)(
         filter=f'display_name="{endpoint_name}"',
         order_by="create_time desc"
     )
@@ -120,7 +153,7 @@ def deploy_model_to_endpoint(
     if existing_endpoints:
         endpoint = existing_endpoints[0]
         print(f"✅ Using existing endpoint: {endpoint.display_name}")
-        print(f"   Endpoint ID: {endpoint.name.split('/')[-1]}")
+        print(f"   Endpoint ID: {rid(endpoint.name)}")
     else:
         print(f"📍 Creating new endpoint...")
         endpoint = create_endpoint(endpoint_name, project_id, region)
@@ -137,22 +170,43 @@ def deploy_model_to_endpoint(
     
     print("⏳ Deploying... This will take 15-30 minutes.")
     print("   You can close this window - deployment will continue in the background.")
-    print(f"   Monitor at: https://console.cloud.google.com/vertex-ai/endpoints/{endpoint.name.split('/')[-1]}?project={project_id}")
+    print(f"   Monitor at: https://console.cloud.google.com/vertex-ai/endpoints/{rid(endpoint.name)}?project={project_id}")
     
     start_time = time.time()
     
-    # Deploy the model
-    deployed_model = model.deploy(
-        endpoint=endpoint,
-        deployed_model_display_name=f"{model.display_name}-deployment",
-        machine_type=machine_type,
-        accelerator_type=accelerator_type,
-        accelerator_count=accelerator_count,
-        min_replica_count=min_replica_count,
-        max_replica_count=max_replica_count,
-        traffic_percentage=100,
-        sync=True,  # Wait for deployment to complete
-    )
+    if legacy_sync:
+        # Let the SDK block (with its own backoff) until the deployment is done
+        model.deploy(
+            endpoint=endpoint,
+            deployed_model_display_name=f"{model.display_name}-deployment",
+            machine_type=machine_type,
+            accelerator_type=accelerator_type,
+            accelerator_count=accelerator_count,
+            min_replica_count=min_replica_count,
+            max_replica_count=max_replica_count,
+            traffic_percentage=100,
+            sync=True,  # Wait for deployment to complete
+        )
+    else:
+        # Submit the DeployModel operation and poll it ourselves
+        operation = endpoint.api_client.deploy_model(
+            endpoint=endpoint.resource_name,
+            deployed_model={
+                "model": model.resource_name,
+                "display_name": f"{model.display_name}-deployment",
+                "dedicated_resources": {
+                    "machine_spec": {
+                        "machine_type": machine_type,
+                        "accelerator_type": accelerator_type,
+                        "accelerator_count": accelerator_count,
+                    },
+                    "min_replica_count": min_replica_count,
+                    "max_replica_count": max_replica_count,
+                },
+            },
+            traffic_split={"0": 100},
+        )
+        wait_for_operation(operation, start_time)
     
     elapsed_time = time.time() - start_time
     
@@ -161,12 +215,12 @@ def deploy_model_to_endpoint(
     print(f"{'='*80}")
     print(f"⏱️  Time taken: {elapsed_time/60:.1f} minutes")
     print(f"🎯 Endpoint: {endpoint.display_name}")
-    print(f"📍 Endpoint ID: {endpoint.name.split('/')[-1]}")
-    print(f"🔗 Console: https://console.cloud.google.com/vertex-ai/endpoints/{endpoint.name.split('/')[-1]}?project={project_id}")
+    print(f"📍 Endpoint ID: {rid(endpoint.name)}")
+    print(f"🔗 Console: https://console.cloud.google.com/vertex-ai/endpoints/{rid(endpoint.name)}?project={project_id}")
     print(f"{'='*80}\n")
     
     # Save endpoint ID to .env instructions
-    endpoint_id = endpoint.name.split('/')[-1]
+    endpoint_id = rid(endpoint.name)
     print("📝 Add this to your .env file:")
     print(f"   GCP_ENDPOINT_ID={endpoint_id}")
     print()
@@ -174,6 +228,28 @@ def deploy_model_to_endpoint(
     return endpoint, endpoint_id
 
 
+def deploy_model_to_endpoints(model_id: str, endpoint_names: list, **kwargs) -> list:
+    """
+    Deploy a model to several endpoints at the same time.
+    
+    Each deployment runs deploy_model_to_endpoint in its own thread (at most
+    MAX_CONCURRENT_REQUESTS at once), so the batch takes about as long as
+    the slowest deployment.
+    
+    Args:
+        model_id: Model ID or full resource name
+        endpoint_names: Display names of the endpoints
+        **kwargs: Passed on to deploy_model_to_endpoint
+        
+    Returns:
+        One (endpoint, endpoint_id) tuple or exception per endpoint name
+    """
+    deploy = partial(deploy_model_to_endpoint, model_id, **kwargs)
+    return asyncio.run(
+        gather_in_threads(lambda name: deploy(endpoint_name=name), endpoint_names)
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Deploy model to Vertex AI endpoint"
@@ -188,6 +264,12 @@ def main():
         default="nutrition-assistant-endpoint",
         help="Display name for the endpoint"
     )
+    parser.add_argument(
+        "--endpoints",
+        default=None,
+        help="Comma-separated endpoint display names to deploy to in parallel "
+             "(overrides --endpoint-name)"
+    )
     parser.add_argument(
         "--machine-type",
         default="n1-standard-8",
@@ -218,28 +300,51 @@ def main():
     )
     parser.add_argument(
         "--project-id",
-        default=None,
-        help="GCP project ID (default: from .env)"
+        default=PROJECT_ID,
+        help="GCP project ID (default: GCP_PROJECT_ID from .env, %(default)s)"
     )
     parser.add_argument(
         "--region",
-        default=None,
-        help="GCP region (default: from .env)"
+        default=REGION,
+        help="GCP region (default: GCP_REGION from .env, %(default)s)"
+    )
+    parser.add_argument(
+        "--legacy-sync",
+        action="store_true",
+        help="Wait inside model.deploy(sync=True) instead of polling the operation"
     )
     
     args = parser.parse_args()
     
+    deploy_kwargs = dict(
+        machine_type=args.machine_type,
+        accelerator_type=args.accelerator_type,
+        accelerator_count=args.accelerator_count,
+        min_replica_count=args.min_replicas,
+        max_replica_count=args.max_replicas,
+        project_id=args.project_id,
+        region=args.region,
+        legacy_sync=args.legacy_sync
+    )
+    
+    if args.endpoints:
+        endpoint_names = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+        results = deploy_model_to_endpoints(args.model_id, endpoint_names, **deploy_kwargs)
+        
+        print("\n" + "="*80)
+        for name, result in zip(endpoint_names, results):
+            if isinstance(result, Exception):
+                print(f"❌ {name}: deployment failed: {result}")
+            else:
+                print(f"✅ {name}: GCP_ENDPOINT_ID={result[1]}")
+        print("="*80 + "\n")
+        return 1 if any(isinstance(result, Exception) for result in results) else 0
+    
     try:
         endpoint, endpoint_id = deploy_model_to_endpoint(
             model_id=args.model_id,
             endpoint_name=args.endpoint_name,
-            machine_type=args.machine_type,
-            accelerator_type=args.accelerator_type,
-            accelerator_count=args.accelerator_count,
-            min_replica_count=args.min_replicas,
-            max_replica_count=args.max_replicas,
-            project_id=args.project_id,
-            region=args.region
+            **deploy_kwargs
         )
         
         print("\n" + "="*80)
@@ -1,40 +1,53 @@
 """
 Script pour finaliser le déploiement sur l'endpoint existant.
 """
-import os
-from google.cloud import aiplatform
-from dotenv import load_dotenv
-import time
+import asyncio
 
-load_dotenv()
+from _gcp_client import (
+    PROJECT_ID,
+    get_endpoint,
+    get_endpoint_lite,
+    get_model,
+)
 
-PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-REGION = os.getenv("GCP_REGION", "europe-west2")
 MODEL_ID = "3561348948692041728"
 ENDPOINT_ID = "5724492940806455296"
 
-aiplatform.init(project=PROJECT_ID, location=REGION)
-
 print(f"\n{'='*80}")
 print("🚀 Finalisation du déploiement")
 print(f"{'='*80}\n")
 
-# Charger le modèle et l'endpoint
-print("📦 Chargement du modèle...")
-model = aiplatform.Model(f"projects/432566588992/locations/{REGION}/models/{MODEL_ID}")
-print(f"✅ Modèle: {model.display_name}\n")
 
-print("📍 Chargement de l'endpoint...")
-endpoint = aiplatform.Endpoint(f"projects/432566588992/locations/{REGION}/endpoints/{ENDPOINT_ID}")
-print(f"✅ Endpoint: {endpoint.display_name}\n")
+async def load_model_and_endpoint():
+    """Charger le modèle et l'endpoint en parallèle (deux GET simultanés)."""
+    return await asyncio.gather(
+        asyncio.to_thread(get_model, MODEL_ID),
+        asyncio.to_thread(get_endpoint, ENDPOINT_ID),
+    )
+
 
-# Vérifier si déjà déployé
-if endpoint.gca_resource.deployed_models:
+# Vérifier d'abord si déjà déployé: une seule requête limitée aux champs
+# utiles, sans initialiser le SDK ni charger le modèle
+print("📦 Vérification de l'endpoint...")
+endpoint_resource = get_endpoint_lite(
+    ENDPOINT_ID, fields=("display_name", "deployed_models", "traffic_split")
+)
+if endpoint_resource is None:
+    print(f"❌ Endpoint introuvable: {ENDPOINT_ID}")
+    exit(1)
+print(f"✅ Endpoint: {endpoint_resource.display_name}\n")
+
+if endpoint_resource.deployed_models:
     print("✅ Le modèle est déjà déployé!")
-    for dm in endpoint.gca_resource.deployed_models:
+    for dm in endpoint_resource.deployed_models:
         print(f"   - {dm.display_name}")
     print(f"\n🔗 Console: https://console.cloud.google.com/vertex-ai/online-prediction/endpoints/{ENDPOINT_ID}?project={PROJECT_ID}")
 else:
+    # Charger le modèle et l'endpoint
+    print("📦 Chargement du modèle et de l'endpoint...")
+    model, endpoint = asyncio.run(load_model_and_endpoint())
+    print(f"✅ Modèle: {model.display_name}\n")
+    
     print("⏳ Déploiement du modèle sur l'endpoint...")
     print("   Configuration: n1-standard-8 + NVIDIA Tesla T4")
     print("   Temps estimé: 15-30 minutes")
@@ -64,7 +77,6 @@ else:
     print("3. Attendez que le statut soit 'Serving' (vert)")
     print("4. Ensuite, mettez à jour .env avec:")
     print(f"   GCP_ENDPOINT_ID={ENDPOINT_ID}")
-    print(f"   GCP_PROJECT_NUMBER=432566588992")
     print("5. Testez avec: chainlit run src/app/main.py -w")
     print(f"\n{'='*80}\n")
 
@@ -3,14 +3,15 @@ Script to find the fine-tuned model artifact URI in GCS.
 """
 import os
 from google.cloud import storage
-from dotenv import load_dotenv
+from _env import load_env
 
-load_dotenv()
+load_env()
 
 # Configuration
 BUCKET_NAME = "llmops_101_europ"
 PIPELINE_JOB_ID = "nutrition-assistant-training-pipeline-20251021140422"
 PREFIX = f"pipeline_root/{PIPELINE_JOB_ID}/"
+MODEL_GLOB = f"{PREFIX}**fine-tuning-component**fine_tuned_model**"
 
 # Initialize GCS client
 client = storage.Client()
@@ -20,30 +21,25 @@ print(f"\n{'='*80}")
 print(f"Searching for fine-tuned model in: gs://{BUCKET_NAME}/{PREFIX}")
 print(f"{'='*80}\n")
 
-# List all blobs with the prefix
-blobs = list(bucket.list_blobs(prefix=PREFIX))
-
-# Look for the fine-tuning component output
-model_artifacts = []
-for blob in blobs:
-    if "fine-tuning-component" in blob.name and "fine_tuned_model" in blob.name:
-        model_artifacts.append(blob.name)
-
-if model_artifacts:
-    print("Found fine-tuned model artifacts:\n")
-    for artifact in sorted(model_artifacts):
-        print(f"  gs://{BUCKET_NAME}/{artifact}")
-    
-    # Find the base directory (without specific files)
-    base_paths = set()
-    for artifact in model_artifacts:
-        # Extract path up to fine_tuned_model directory
-        if "fine_tuned_model" in artifact:
-            parts = artifact.split("fine_tuned_model")
-            if len(parts) >= 2:
-                base_path = parts[0] + "fine_tuned_model"
-                base_paths.add(base_path)
+# Let GCS filter on the fine-tuning component output and only return names,
+# instead of walking every blob under the pipeline root. The listing is
+# streamed page by page; GCS returns names in lexicographic order, so they are
+# printed as they arrive and only the distinct base directories are kept.
+base_paths = set()
+for blob in bucket.list_blobs(
+    match_glob=MODEL_GLOB,
+    page_size=1000,
+    fields="items(name),nextPageToken",
+):
+    if not base_paths:
+        print("Found fine-tuned model artifacts:\n")
+    print(f"  gs://{BUCKET_NAME}/{blob.name}")
     
+    # Extract path up to fine_tuned_model directory (always in the name,
+    # MODEL_GLOB requires it)
+    base_paths.add(blob.name.partition("fine_tuned_model")[0] + "fine_tuned_model")
+
+if base_paths:
     print(f"\n{'='*80}")
     print("Model Base Directory (use this for registration):")
     print(f"{'='*80}\n")
@@ -54,7 +50,9 @@ if model_artifacts:
 else:
     print("❌ No fine-tuned model artifacts found.")
     print("\nShowing first 20 files in pipeline root:")
-    for i, blob in enumerate(blobs[:20]):
+    for blob in bucket.list_blobs(
+        prefix=PREFIX, max_results=20, fields="items(name),nextPageToken"
+    ):
         print(f"  {blob.name}")
 
 print(f"\n{'='*80}\n")
@@ -1,16 +1,7 @@
 """
 Script pour obtenir les vraies URLs de la console GCP.
 """
-import os
-from google.cloud import aiplatform
-from dotenv import load_dotenv
-
-load_dotenv()
-
-PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-REGION = os.getenv("GCP_REGION", "europe-west2")
-
-aiplatform.init(project=PROJECT_ID, location=REGION)
+from _gcp_client import PROJECT_ID, REGION, list_recent_endpoints, list_recent_models, rid
 
 print(f"\n{'='*80}")
 print("🔗 VRAIES URLs DE LA CONSOLE GCP")
@@ -37,9 +28,9 @@ print("📦 VOS MODÈLES:")
 print(f"{'='*80}\n")
 
 try:
-    models = aiplatform.Model.list(order_by="create_time desc")
-    for i, model in enumerate(models[:3], 1):
-        model_id = model.name.split('/')[-1].split('@')[0]
+    models = list_recent_models(3, fields=["name", "display_name"])
+    for i, model in enumerate(models, 1):
+        model_id = rid(model.name)
         print(f"{i}. {model.display_name}")
         print(f"   ID: {model_id}")
         print(f"   URL: https://console.cloud.google.com/vertex-ai/models/{model_id}/versions?project={PROJECT_ID}\n")
@@ -52,18 +43,18 @@ print("🎯 VOS ENDPOINTS:")
 print(f"{'='*80}\n")
 
 try:
-    endpoints = aiplatform.Endpoint.list(order_by="create_time desc")
+    endpoints = list_recent_endpoints(3, fields=["name", "display_name", "deployed_models"])
     if endpoints:
-        for i, endpoint in enumerate(endpoints[:3], 1):
-            endpoint_id = endpoint.name.split('/')[-1]
+        for i, endpoint in enumerate(endpoints, 1):
+            endpoint_id = rid(endpoint.name)
             print(f"{i}. {endpoint.display_name}")
             print(f"   ID: {endpoint_id}")
             print(f"   URL: https://console.cloud.google.com/vertex-ai/online-prediction/endpoints/{endpoint_id}?project={PROJECT_ID}")
             print(f"   Région: {REGION}")
             
             # Vérifier les modèles déployés
-            if endpoint.gca_resource.deployed_models:
-                print(f"   Modèles déployés: {len(endpoint.gca_resource.deployed_models)}")
+            if endpoint.deployed_models:
+                print(f"   Modèles déployés: {len(endpoint.deployed_models)}")
             else:
                 print(f"   ⚠️ Aucun modèle déployé sur cet endpoint")
             print()
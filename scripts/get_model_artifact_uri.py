@@ -1,52 +1,60 @@
 """
 Script to get the model artifact URI from the completed pipeline.
 """
-import os
-from google.cloud import aiplatform
-from dotenv import load_dotenv
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+from _gcp_client import gcs_uri_marker, get_pipeline_job_lite
 
-# Initialize Vertex AI
-PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-REGION = os.getenv("GCP_REGION", "europe-west2")
 PIPELINE_JOB_ID = "nutrition-assistant-training-pipeline-20251021140422"
 
-aiplatform.init(project=PROJECT_ID, location=REGION)
-
-# Get the pipeline job
-pipeline_job = aiplatform.PipelineJob.get(
-    resource_name=f"projects/432566588992/locations/{REGION}/pipelineJobs/{PIPELINE_JOB_ID}"
+# Get the pipeline job (without the compiled pipeline_spec)
+pipeline_job = get_pipeline_job_lite(
+    PIPELINE_JOB_ID, fields=["name", "display_name", "state", "job_detail"]
 )
+if pipeline_job is None:
+    sys.exit(f"Pipeline job not found: {PIPELINE_JOB_ID}")
 
 print(f"\n{'='*80}")
 print(f"Pipeline Job: {pipeline_job.display_name}")
-print(f"State: {pipeline_job.state}")
+print(f"State: {pipeline_job.state.name}")
 print(f"{'='*80}\n")
 
 # Get the task details
-task_details = pipeline_job.task_details
+task_details = pipeline_job.job_detail.task_details
 
 print(f"Pipeline has {len(task_details)} tasks:\n")
 
-for task in task_details:
-    print(f"Task: {task.task_name}")
-    print(f"  State: {task.state}")
+
+def _render_task(task) -> str:
+    """Render one task and check its fine-tuned artifacts exist in GCS."""
+    out = io.StringIO()
+    out.write(f"Task: {task.task_name}\n")
+    out.write(f"  State: {task.state.name}\n")
     
     # Look for the fine-tuning task outputs
     if "fine-tune" in task.task_name.lower() and task.outputs:
-        print(f"  Outputs:")
+        out.write(f"  Outputs:\n")
         for output_name, output_value in task.outputs.items():
-            print(f"    {output_name}: {output_value}")
+            out.write(f"    {output_name}: {output_value}\n")
             
             # Try to extract artifact URI
             if hasattr(output_value, 'artifacts') and output_value.artifacts:
                 for artifact in output_value.artifacts:
                     if hasattr(artifact, 'uri'):
-                        print(f"      Artifact URI: {artifact.uri}")
+                        marker = gcs_uri_marker(artifact.uri, missing="❌ not found")
+                        out.write(f"      Artifact URI: {artifact.uri} {marker}".rstrip() + "\n")
             elif hasattr(output_value, 'uri'):
-                print(f"      URI: {output_value.uri}")
-    print()
+                out.write(f"      URI: {output_value.uri}\n")
+    out.write("\n")
+    return out.getvalue()
+
+
+# GCS checks overlap across tasks; output stays in task order
+with ThreadPoolExecutor(max_workers=16) as executor:
+    for rendered in executor.map(_render_task, task_details):
+        print(rendered, end="")
 
 print(f"\n{'='*80}")
 print("GCS Pipeline Root:")
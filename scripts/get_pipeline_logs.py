@@ -7,9 +7,10 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from google.cloud import aiplatform
+import io
 import logging
 
+from _gcp_client import get_pipeline_job_lite
 from src.constants import GCP_PROJECT_ID, GCP_REGION
 
 logging.basicConfig(level=logging.INFO)
@@ -19,20 +20,11 @@ logger = logging.getLogger(__name__)
 def get_pipeline_details(job_id: str = None):
     """Get detailed information about a pipeline run."""
     
-    aiplatform.init(project=GCP_PROJECT_ID, location=GCP_REGION)
-    
-    if job_id:
-        # Get specific job
-        job = aiplatform.PipelineJob.get(
-            resource_name=f"projects/{GCP_PROJECT_ID}/locations/{GCP_REGION}/pipelineJobs/{job_id}"
-        )
-    else:
-        # Get latest job
-        jobs = list(aiplatform.PipelineJob.list(order_by="create_time desc"))
-        if not jobs:
-            logger.error("No pipeline jobs found")
-            return
-        job = jobs[0]
+    # Specific job, or the latest one; pipeline_spec is not fetched
+    job = get_pipeline_job_lite(job_id, region=GCP_REGION)
+    if job is None:
+        logger.error("No pipeline jobs found")
+        return
     
     logger.info("=" * 80)
     logger.info(f"Pipeline: {job.display_name}")
@@ -45,7 +37,7 @@ def get_pipeline_details(job_id: str = None):
     logger.info("\n📋 TASK DETAILS:\n")
     
     try:
-        task_details = job.task_details
+        task_details = job.job_detail.task_details
         
         for task in task_details:
             logger.info(f"\nTask: {task.task_name}")
@@ -57,10 +49,10 @@ def get_pipeline_details(job_id: str = None):
                 logger.info(f"  ❌ FAILED TASK FOUND!")
                 
                 # Try to get error information
-                if hasattr(task, 'error') and task.error:
+                if task.error.message:
                     logger.info(f"  Error: {task.error}")
                 
-                if hasattr(task, 'execution'):
+                if task.execution:
                     logger.info(f"  Execution: {task.execution}")
                     
             logger.info("-" * 80)
@@ -70,15 +62,15 @@ def get_pipeline_details(job_id: str = None):
     
     # Get job details
     logger.info("\n📊 JOB DETAILS:\n")
-    logger.info(f"Job Resource Name: {job.resource_name}")
-    logger.info(f"Pipeline Spec URI: {job.pipeline_spec_uri if hasattr(job, 'pipeline_spec_uri') else 'N/A'}")
+    logger.info(f"Job Resource Name: {job.name}")
+    logger.info(f"Pipeline Spec URI: {job.template_uri or 'N/A'}")
     
     # Get GCS bucket info
     logger.info("\n📦 ARTIFACTS:\n")
-    logger.info(f"GCS Root: {job.pipeline_spec.get('defaultPipelineRoot', 'N/A') if hasattr(job, 'pipeline_spec') else 'N/A'}")
+    logger.info(f"GCS Root: {job.runtime_config.gcs_output_directory or 'N/A'}")
     
     # Console URL
-    job_id = job.resource_name.split("/")[-1]
+    job_id = job.name.split("/")[-1]
     console_url = f"https://console.cloud.google.com/vertex-ai/pipelines/runs/{job_id}?project={GCP_PROJECT_ID}"
     logger.info(f"\n🔗 View in Console: {console_url}")
     
@@ -95,4 +87,10 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    get_pipeline_details(job_id=args.job_id)
+    # Collect the report and write it to stderr in one call
+    buffer = io.StringIO()
+    logging.getLogger().handlers[0].setStream(buffer)
+    try:
+        get_pipeline_details(job_id=args.job_id)
+    finally:
+        sys.stderr.write(buffer.getvalue())
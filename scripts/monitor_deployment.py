@@ -2,20 +2,93 @@
 Monitor the deployment status and update .env file when complete.
 
 Usage:
-    python scripts/monitor_deployment.py
+    python scripts/monitor_deployment.py [--wait] [--timeout 1800]
 """
-import os
+import argparse
 import time
-from google.cloud import aiplatform
-from dotenv import load_dotenv
 
-load_dotenv()
+from google.protobuf import duration_pb2
+
+from _env import update_env
+from _gcp_client import (
+    DEFAULT_RETRY,
+    PROJECT_ID,
+    REGION,
+    endpoint_service_client,
+    list_endpoints,
+    rid,
+)
 
-PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-REGION = os.getenv("GCP_REGION", "europe-west2")
 ENDPOINT_NAME = "nutrition-assistant-endpoint"
 
-aiplatform.init(project=PROJECT_ID, location=REGION)
+# Longest single WaitOperation call, and the cap for the polling fallback
+WAIT_CHUNK_SECONDS = 300
+POLL_MAX_SECONDS = 30
+
+
+def wait_for_deployment(endpoint_resource_name: str, timeout: int) -> list:
+    """
+    Block until the endpoint has deployed models or the timeout expires.
+    
+    Pending DeployModel operations on the endpoint are waited on with the
+    server-side WaitOperation long poll. If there are none (or they finish
+    without a model showing up), the endpoint is polled with exponential
+    backoff capped at POLL_MAX_SECONDS. A deploy operation that fails ends
+    the wait straight away.
+    
+    Args:
+        endpoint_resource_name: Full resource name of the endpoint
+        timeout: Maximum number of seconds to wait
+        
+    Returns:
+        The deployed models (empty if the timeout expired first)
+    """
+    client = endpoint_service_client()
+    deadline = time.monotonic() + timeout
+    
+    operations = client.list_operations(
+        request={"name": endpoint_resource_name}, retry=DEFAULT_RETRY
+    ).operations
+    for operation in operations:
+        if operation.done or not operation.metadata.type_url.endswith("DeployModelOperationMetadata"):
+            continue
+        print(f"⏳ Waiting on deploy operation {rid(operation.name)}...", flush=True)
+        while not operation.done and time.monotonic() < deadline:
+            chunk = min(WAIT_CHUNK_SECONDS, max(1, int(deadline - time.monotonic())))
+            operation = client.wait_operation(
+                request={"name": operation.name, "timeout": duration_pb2.Duration(seconds=chunk)}
+            )
+        if operation.done and operation.error.code:
+            print(f"❌ Deploy operation failed: {operation.error.message}", flush=True)
+            return []
+    
+    attempt = 0
+    while True:
+        endpoint = client.get_endpoint(name=endpoint_resource_name, retry=DEFAULT_RETRY)
+        if endpoint.deployed_models:
+            return list(endpoint.deployed_models)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return []
+        delay = min(POLL_MAX_SECONDS, 1.5 ** attempt, remaining)
+        print(f"   Still deploying, checking again in {int(delay)}s...", flush=True)
+        time.sleep(delay)
+        attempt += 1
+
+
+parser = argparse.ArgumentParser(description="Monitor the endpoint deployment and update .env")
+parser.add_argument(
+    "--wait",
+    action="store_true",
+    help="Wait for the deployment to finish instead of exiting when it is still running"
+)
+parser.add_argument(
+    "--timeout",
+    type=int,
+    default=1800,
+    help="Maximum seconds to wait with --wait (default: %(default)s)"
+)
+args = parser.parse_args()
 
 print(f"\n{'='*80}")
 print("📊 Monitoring Deployment Status")
@@ -26,8 +99,8 @@ print(f"Region: {REGION}")
 print(f"{'='*80}\n")
 
 # Get the endpoint
-print("🔍 Finding endpoint...")
-endpoints = aiplatform.Endpoint.list(
+print("🔍 Finding endpoint...", flush=True)
+endpoints = list_endpoints(
     filter=f'display_name="{ENDPOINT_NAME}"',
     order_by="create_time desc"
 )
@@ -38,7 +111,7 @@ if not endpoints:
     exit(1)
 
 endpoint = endpoints[0]
-endpoint_id = endpoint.name.split('/')[-1]
+endpoint_id = rid(endpoint.name)
 
 print(f"✅ Found endpoint: {endpoint.display_name}")
 print(f"   Endpoint ID: {endpoint_id}")
@@ -50,17 +123,21 @@ print(f"\n{'='*80}")
 print("📦 Checking Deployed Models")
 print(f"{'='*80}\n")
 
-if not endpoint.gca_resource.deployed_models:
+deployed_models = list(endpoint.gca_resource.deployed_models)
+if not deployed_models and args.wait:
+    deployed_models = wait_for_deployment(endpoint.resource_name, args.timeout)
+
+if not deployed_models:
     print("⏳ No models deployed yet. Deployment is still in progress.")
     print("   This typically takes 15-30 minutes.")
     print("\n💡 You can:")
-    print("   - Wait and run this script again later")
+    print("   - Wait and run this script again later (or with --wait)")
     print("   - Monitor in console (link above)")
     print("   - Continue with other work - I'll notify when complete")
 else:
-    print(f"✅ Found {len(endpoint.gca_resource.deployed_models)} deployed model(s)!")
+    print(f"✅ Found {len(deployed_models)} deployed model(s)!")
     
-    for deployed_model in endpoint.gca_resource.deployed_models:
+    for deployed_model in deployed_models:
         print(f"\n   Model: {deployed_model.display_name}")
         print(f"   ID: {deployed_model.id}")
         print(f"   Traffic: {deployed_model.traffic_split}%")
@@ -74,35 +151,14 @@ else:
     print("📝 Updating .env File")
     print(f"{'='*80}\n")
     
-    env_file = ".env"
-    env_lines = []
-    endpoint_line = f"GCP_ENDPOINT_ID={endpoint_id}"
-    project_number_line = "GCP_PROJECT_NUMBER=432566588992"
+    # The file is not rewritten at all if the value is already there
+    updates = {"GCP_ENDPOINT_ID": endpoint_id}
     
-    # Read existing .env
-    if os.path.exists(env_file):
-        with open(env_file, 'r') as f:
-            env_lines = f.readlines()
-    
-    # Check if already exists
-    has_endpoint_id = any("GCP_ENDPOINT_ID" in line for line in env_lines)
-    has_project_number = any("GCP_PROJECT_NUMBER" in line for line in env_lines)
-    
-    # Update or append
-    if has_endpoint_id:
-        env_lines = [endpoint_line + "\n" if "GCP_ENDPOINT_ID" in line else line for line in env_lines]
-        print("✅ Updated existing GCP_ENDPOINT_ID in .env")
+    if update_env(updates):
+        for key in updates:
+            print(f"✅ Set {key} in .env")
     else:
-        env_lines.append(endpoint_line + "\n")
-        print("✅ Added GCP_ENDPOINT_ID to .env")
-    
-    if not has_project_number:
-        env_lines.append(project_number_line + "\n")
-        print("✅ Added GCP_PROJECT_NUMBER to .env")
-    
-    # Write back
-    with open(env_file, 'w') as f:
-        f.writelines(env_lines)
+        print("✅ .env already up to date")
     
     print(f"\n{'='*80}")
     print("🎉 Deployment Complete!")
@@ -3,14 +3,16 @@ Pipeline runner script to compile and submit the pipeline to Vertex AI.
 """
 import sys
 import os
+import hashlib
+import shutil
+from importlib.metadata import version
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-from google.cloud import aiplatform
-from kfp import compiler
 import logging
 from datetime import datetime
 
@@ -27,24 +29,106 @@ from src.constants import (
     TRAIN_TEST_SPLIT,
     MAX_INFERENCE_SAMPLES,
 )
-from src.pipelines.model_training_pipeline import nutrition_training_pipeline
+from _gcp_client import init_vertex_ai
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Sources whose content determines the compiled pipeline spec
+PIPELINE_SOURCES = [
+    project_root / "src" / "pipelines" / "model_training_pipeline.py",
+    *sorted((project_root / "src" / "pipeline_components").glob("*.py")),
+]
+
+# Compiled specs by source hash, so switching back to an earlier version of
+# the pipeline (another branch, a reverted edit) reuses its compilation
+PIPELINE_CACHE_DIR = project_root / "_pipeline_cache"
+PIPELINE_CACHE_MAX_ENTRIES = 20
+
+
+def pipeline_source_hash() -> str:
+    """Hash the pipeline and component sources together with the KFP version."""
+    digest = hashlib.blake2b(digest_size=16)
+    # Installed version from the package metadata, without importing KFP
+    digest.update(version("kfp").encode())
+    for source in PIPELINE_SOURCES:
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def is_pipeline_up_to_date(output_file: str) -> bool:
+    """Check whether the compiled YAML still matches the pipeline sources.
+    
+    Args:
+        output_file: Compiled pipeline path, with the KFP version and source
+            hash in a ``.hash`` sidecar
+    """
+    output_path = Path(output_file)
+    hash_path = Path(f"{output_file}.hash")
+    if not output_path.exists() or output_path.stat().st_size == 0 or not hash_path.exists():
+        return False
+    
+    kfp_version, _, source_hash = hash_path.read_text().strip().partition(" ")
+    # An upgraded KFP changes the compiled spec without touching any source
+    if kfp_version != version("kfp"):
+        return False
+    
+    # Fast path: nothing was edited since the hash was last confirmed
+    hash_mtime = hash_path.stat().st_mtime
+    if all(source.stat().st_mtime <= hash_mtime for source in PIPELINE_SOURCES):
+        return True
+    
+    if source_hash != pipeline_source_hash():
+        return False
+    
+    # Sources were touched but not changed; refresh the mtime for the fast path
+    os.utime(hash_path)
+    return True
+
+
+def evict_pipeline_cache(max_entries: int = PIPELINE_CACHE_MAX_ENTRIES):
+    """Delete the least recently used compiled specs beyond ``max_entries``."""
+    entries = sorted(PIPELINE_CACHE_DIR.glob("*.yaml"), key=lambda path: path.stat().st_mtime)
+    for path in entries[:-max_entries]:
+        path.unlink(missing_ok=True)
+
+
 def compile_pipeline(output_file: str = "compiled_pipeline.yaml"):
     """Compile the Kubeflow pipeline to YAML.
     
+    Compilation is skipped when the existing output was built from the same
+    pipeline sources, or when a spec for those sources is in
+    ``_pipeline_cache/`` (the last PIPELINE_CACHE_MAX_ENTRIES are kept).
+    
     Args:
         output_file: Output filename for compiled pipeline
     """
-    logger.info(f"Compiling pipeline to {output_file}")
+    if is_pipeline_up_to_date(output_file):
+        logger.info(f"✅ Compiled pipeline {output_file} is up to date")
+        return output_file
+    
+    source_hash = pipeline_source_hash()
+    cached_file = PIPELINE_CACHE_DIR / f"{PIPELINE_NAME}_{source_hash}.yaml"
+    
+    if cached_file.exists():
+        logger.info(f"✅ Reusing compiled pipeline {cached_file.name}")
+        os.utime(cached_file)
+    else:
+        logger.info(f"Compiling pipeline to {output_file}")
+        # KFP and the pipeline definition are only imported to compile
+        from kfp import compiler
+        from src.pipelines.model_training_pipeline import nutrition_training_pipeline
+        
+        PIPELINE_CACHE_DIR.mkdir(exist_ok=True)
+        compiler.Compiler().compile(
+            pipeline_func=nutrition_training_pipeline,
+            package_path=str(cached_file),
+        )
+        evict_pipeline_cache()
     
-    compiler.Compiler().compile(
-        pipeline_func=nutrition_training_pipeline,
-        package_path=output_file,
-    )
+    shutil.copyfile(cached_file, output_file)
+    Path(f"{output_file}.hash").write_text(f"{version('kfp')} {source_hash}")
     
     logger.info(f"✅ Pipeline compiled successfully to {output_file}")
     return output_file
@@ -53,22 +137,24 @@ def compile_pipeline(output_file: str = "compiled_pipeline.yaml"):
 def submit_pipeline(
     compiled_pipeline_path: str,
     enable_caching: bool = False,
+    timestamp: str = None,
 ):
     """Submit the compiled pipeline to Vertex AI.
     
     Args:
         compiled_pipeline_path: Path to compiled pipeline YAML
         enable_caching: Whether to enable pipeline caching
+        timestamp: Run timestamp used in the job name (default: now)
     """
-    # Initialize Vertex AI
+    from google.cloud import aiplatform
+    
+    # Initialize Vertex AI (once per process)
     logger.info(f"Initializing Vertex AI with project: {GCP_PROJECT_ID}, region: {GCP_REGION}")
-    aiplatform.init(
-        project=GCP_PROJECT_ID,
-        location=GCP_REGION,
-    )
+    init_vertex_ai(GCP_PROJECT_ID, GCP_REGION)
     
     # Prepare pipeline parameters
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     gcs_data_uri = f"{GCS_BUCKET_URI}/COMBINED_FOOD_DATASET.csv"
     
     pipeline_params = {
@@ -120,6 +206,9 @@ def run_pipeline(compile_only: bool = False, enable_caching: bool = False):
         compile_only: If True, only compile without submitting
         enable_caching: Whether to enable pipeline caching
     """
+    # One timestamp for the whole run
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
     try:
         # Compile the pipeline
         compiled_pipeline = compile_pipeline("compiled_nutrition_pipeline.yaml")
@@ -129,7 +218,9 @@ def run_pipeline(compile_only: bool = False, enable_caching: bool = False):
             return None
         
         # Submit to Vertex AI
-        job = submit_pipeline(compiled_pipeline, enable_caching=enable_caching)
+        job = submit_pipeline(
+            compiled_pipeline, enable_caching=enable_caching, timestamp=timestamp
+        )
         
         return job
         
@@ -0,0 +1,112 @@
+"""
+Script to quantize the fine-tuned model to 4-bit AWQ for serving.
+
+The pipeline saves a LoRA adapter; it is first merged into its base model,
+then the merged weights are quantized with AutoAWQ (GEMM kernels). The output
+directory carries a `quantization_config`, so both the Hugging Face path and
+the vLLM path of src/handler.py load it with the quantized kernels, without
+any change to the handler.
+
+Run this on a GPU machine with `autoawq` installed, then upload the output
+directory and register it with scripts/register_model_with_custom_handler.py.
+
+Usage:
+    python scripts/quantize_model.py \
+        --model-dir ./local_model \
+        --output-dir ./local_model_awq
+"""
+import os
+import json
+import argparse
+import tempfile
+
+# Default AWQ settings: 4-bit weights, groups of 128, GEMM kernels
+QUANT_CONFIG = {
+    "w_bit": 4,
+    "q_group_size": 128,
+    "zero_point": True,
+    "version": "GEMM",
+}
+
+
+def merge_adapter(model_dir: str, merged_dir: str) -> str:
+    """
+    Merge a LoRA adapter directory into its base model.
+
+    Args:
+        model_dir: Adapter directory (with adapter_config.json)
+        merged_dir: Directory where the merged model is saved
+
+    Returns:
+        Path of the merged model
+    """
+    import torch
+    from peft import PeftModel
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    with open(os.path.join(model_dir, "adapter_config.json")) as f:
+        base_model_name = json.load(f)["base_model_name_or_path"]
+
+    print(f"🔗 Merging adapter {model_dir} into {base_model_name}")
+    base_model = AutoModelForCausalLM.from_pretrained(
+        base_model_name,
+        torch_dtype=torch.float16,
+        trust_remote_code=True,
+    )
+    model = PeftModel.from_pretrained(base_model, model_dir).merge_and_unload()
+    model.save_pretrained(merged_dir)
+    AutoTokenizer.from_pretrained(model_dir, trust_remote_code=True).save_pretrained(merged_dir)
+    return merged_dir
+
+
+def quantize_model(model_dir: str, output_dir: str) -> None:
+    """
+    Quantize a model directory (adapter or full model) with AWQ.
+
+    Args:
+        model_dir: Local model directory
+        output_dir: Directory where the quantized model is saved
+    """
+    from awq import AutoAWQForCausalLM
+    from transformers import AutoTokenizer
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if os.path.exists(os.path.join(model_dir, "adapter_config.json")):
+            model_dir = merge_adapter(model_dir, tmp_dir)
+
+        print(f"⚙️  Quantizing {model_dir} with {QUANT_CONFIG}")
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, trust_remote_code=True)
+        model = AutoAWQForCausalLM.from_pretrained(model_dir, trust_remote_code=True)
+        model.quantize(tokenizer, quant_config=QUANT_CONFIG)
+
+        model.save_quantized(output_dir)
+        tokenizer.save_pretrained(output_dir)
+
+    print(f"✅ Quantized model saved to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quantize the fine-tuned model to 4-bit AWQ for serving"
+    )
+    parser.add_argument(
+        "--model-dir",
+        required=True,
+        help="Local directory of the fine-tuned model (LoRA adapter or merged model)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        required=True,
+        help="Directory where the quantized model is written"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model_dir):
+        print(f"❌ Model directory not found: {args.model_dir}")
+        exit(1)
+
+    quantize_model(args.model_dir, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
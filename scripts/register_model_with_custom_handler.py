@@ -11,13 +11,35 @@ Usage:
         --model-name nutrition-assistant \
         --model-description "Fine-tuned Phi-3 for nutrition questions"
 """
+from __future__ import annotations
+
 import os
 import argparse
+import base64
+import importlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from google.cloud import storage, aiplatform
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
+from _env import load_env
+from _gcp_client import PROJECT_ID, REGION
+
+# The SDK and GCS client are imported where they are used, after the
+# arguments have been parsed and validated
+if TYPE_CHECKING:
+    from google.cloud import aiplatform
+
+load_env()
+
 
-load_dotenv()
+def file_crc32c(path: str) -> str:
+    """Return the base64 CRC32C of a file, as GCS expects it in object metadata."""
+    import google_crc32c
+    
+    checksum = google_crc32c.Checksum()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode()
 
 
 def upload_handler_to_gcs(
@@ -45,6 +67,8 @@ def upload_handler_to_gcs(
         bucket_name = uri_parts[0]
     blob_prefix = uri_parts[1] if len(uri_parts) > 1 else ""
     
+    from google.cloud import storage
+    
     # Initialize GCS client
     client = storage.Client()
     bucket = client.bucket(bucket_name)
@@ -54,7 +78,11 @@ def upload_handler_to_gcs(
     blob = bucket.blob(handler_blob_name)
     
     print(f"📤 Uploading {handler_file_path} to gs://{bucket_name}/{handler_blob_name}")
-    blob.upload_from_filename(handler_file_path)
+    # GCS verifies the upload against the CRC32C sent with it, so the client
+    # does not hash the body a second time while streaming it
+    blob.crc32c = file_crc32c(handler_file_path)
+    with open(handler_file_path, "rb") as handler_file:
+        blob.upload_from_file(handler_file, checksum=None)
     print(f"✅ Handler uploaded successfully!")
     
     return f"gs://{bucket_name}/{handler_blob_name}"
@@ -66,8 +94,8 @@ def register_model_to_vertex_ai(
     model_description: str = None,
     parent_model: str = None,
     labels: dict = None,
-    project_id: str = None,
-    region: str = None
+    project_id: str = PROJECT_ID,
+    region: str = REGION
 ) -> aiplatform.Model:
     """
     Register the fine-tuned model to Vertex AI Model Registry.
@@ -84,12 +112,9 @@ def register_model_to_vertex_ai(
     Returns:
         The registered Model object
     """
-    # Initialize Vertex AI
-    if project_id is None:
-        project_id = os.getenv("GCP_PROJECT_ID")
-    if region is None:
-        region = os.getenv("GCP_REGION", "europe-west2")
+    from google.cloud import aiplatform
     
+    # Initialize Vertex AI
     aiplatform.init(project=project_id, location=region)
     
     # Pre-built HuggingFace container for Vertex AI with PyTorch and Transformers
@@ -161,13 +186,13 @@ def main():
     )
     parser.add_argument(
         "--project-id",
-        default=None,
-        help="GCP project ID (default: from .env)"
+        default=PROJECT_ID,
+        help="GCP project ID (default: GCP_PROJECT_ID from .env, %(default)s)"
     )
     parser.add_argument(
         "--region",
-        default=None,
-        help="GCP region (default: from .env)"
+        default=REGION,
+        help="GCP region (default: GCP_REGION from .env, %(default)s)"
     )
     
     args = parser.parse_args()
@@ -178,21 +203,25 @@ def main():
         return 1
     
     try:
-        # Step 1: Upload handler to GCS
-        print(f"\n{'='*80}")
-        print("Step 1: Uploading handler.py to GCS")
-        print(f"{'='*80}\n")
+        # The SDK import (several seconds) overlaps the handler upload; the
+        # model is only registered once handler.py is in the artifact URI
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sdk_import = executor.submit(importlib.import_module, "google.cloud.aiplatform")
+            
+            # Step 1: Upload handler.py to GCS
+            print(f"\n{'='*80}")
+            print("Step 1: Uploading handler.py to GCS")
+            print(f"{'='*80}\n")
+            handler_uri = upload_handler_to_gcs(
+                handler_file_path=args.handler_path,
+                model_artifact_uri=args.model_uri
+            )
+            sdk_import.result()
         
-        handler_uri = upload_handler_to_gcs(
-            handler_file_path=args.handler_path,
-            model_artifact_uri=args.model_uri
-        )
-        
-        # Step 2: Register model to Vertex AI
+        # Step 2: Register model
         print(f"\n{'='*80}")
         print("Step 2: Registering model to Vertex AI Model Registry")
         print(f"{'='*80}\n")
-        
         model = register_model_to_vertex_ai(
             model_artifact_uri=args.model_uri,
             model_name=args.model_name,
@@ -6,26 +6,36 @@ Usage:
 """
 import os
 import argparse
-import subprocess
 import requests
 import json
-from dotenv import load_dotenv
+from google.auth.transport.requests import Request
+from requests.adapters import HTTPAdapter
+from _env import load_env
+from _gcp_client import get_credentials, resource_project
 
-load_dotenv()
+load_env()
+
+# One pooled session for the token refresh and the predict calls, so repeated
+# requests reuse the keep-alive TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
 
 
 def get_access_token() -> str:
-    """Get GCP access token using gcloud CLI."""
+    """Get a GCP access token from Application Default Credentials.
+    
+    The credentials are resolved once per process and only refreshed when
+    the token is missing or expired.
+    """
     try:
-        access_token = subprocess.check_output(
-            ["gcloud", "auth", "print-access-token"],
-            text=True
-        ).strip()
-        return access_token
+        credentials = get_credentials()
+        if not credentials.valid:
+            credentials.refresh(Request(session=_SESSION))
+        return credentials.token
     except Exception as e:
         print(f"❌ Error getting access token: {e}")
-        print("Make sure gcloud CLI is installed and authenticated:")
-        print("  gcloud auth login")
+        print("Make sure Application Default Credentials are set up:")
+        print("  gcloud auth application-default login")
         raise
 
 
@@ -41,7 +51,7 @@ def test_endpoint(prompt: str, endpoint_id: str = None) -> dict:
         Response dictionary from the endpoint
     """
     # Get configuration
-    project_number = os.getenv("GCP_PROJECT_NUMBER", "432566588992")
+    project = resource_project()
     region = os.getenv("GCP_REGION", "europe-west2")
     
     if endpoint_id is None:
@@ -59,7 +69,7 @@ def test_endpoint(prompt: str, endpoint_id: str = None) -> dict:
     # Build endpoint URL
     endpoint_url = (
         f"https://{region}-aiplatform.googleapis.com/v1/"
-        f"projects/{project_number}/locations/{region}/"
+        f"projects/{project}/locations/{region}/"
         f"endpoints/{endpoint_id}:predict"
     )
     
@@ -92,7 +102,7 @@ def test_endpoint(prompt: str, endpoint_id: str = None) -> dict:
     # Send request
     print("📤 Sending request...")
     try:
-        response = requests.post(
+        response = _SESSION.post(
             endpoint_url,
             headers=headers,
             json=payload,
@@ -7,13 +7,13 @@ Usage:
 """
 import os
 from google.cloud import aiplatform
-from dotenv import load_dotenv
+from _env import load_env
+from _gcp_client import resource_project, start_undeploy_all
 
-load_dotenv()
+load_env()
 
 # Configuration
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-PROJECT_NUMBER = os.getenv("GCP_PROJECT_NUMBER", "432566588992")
 REGION = os.getenv("GCP_REGION", "europe-west2")
 ENDPOINT_ID = os.getenv("GCP_ENDPOINT_ID", "5724492940806455296")
 
@@ -28,7 +28,7 @@ def undeploy_model():
     
     # Get endpoint
     endpoint = aiplatform.Endpoint(
-        endpoint_name=f"projects/{PROJECT_NUMBER}/locations/{REGION}/endpoints/{ENDPOINT_ID}"
+        endpoint_name=f"projects/{resource_project()}/locations/{REGION}/endpoints/{ENDPOINT_ID}"
     )
     
     print(f"\n📍 Endpoint: {endpoint.display_name}")
@@ -44,17 +44,23 @@ def undeploy_model():
     
     print(f"\n📦 Found {len(deployed_models)} deployed model(s)")
     
-    # Undeploy each model
+    # Start every undeploy first, then wait: the models come off in parallel
     for deployed_model in deployed_models:
         print(f"\n🔄 Undeploying: {deployed_model.display_name}")
         print(f"   Deployed Model ID: {deployed_model.id}")
-        
+    
+    try:
+        operations = start_undeploy_all(endpoint)
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        operations = []
+    
+    for deployed_model, operation in operations:
         try:
-            # Undeploy
-            endpoint.undeploy(deployed_model_id=deployed_model.id)
-            print(f"   ✅ Successfully undeployed!")
+            operation.result()
+            print(f"\n   ✅ {deployed_model.display_name}: Successfully undeployed!")
         except Exception as e:
-            print(f"   ❌ Error: {e}")
+            print(f"\n   ❌ {deployed_model.display_name}: Error: {e}")
     
     print("\n" + "=" * 70)
     print("✅ UNDEPLOYMENT COMPLETE!")
@@ -8,7 +8,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from google.api_core import exceptions
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 import logging
 
 from src.constants import GCP_PROJECT_ID, GCP_BUCKET_NAME
@@ -16,6 +18,11 @@ from src.constants import GCP_PROJECT_ID, GCP_BUCKET_NAME
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Files larger than one chunk are uploaded as parallel chunks (XML multipart
+# upload) that GCS assembles into a single object
+UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+UPLOAD_MAX_WORKERS = 8
+
 
 def upload_dataset_to_gcs():
     """Upload the COMBINED_FOOD_DATASET.csv to GCS bucket."""
@@ -35,26 +42,36 @@ def upload_dataset_to_gcs():
         storage_client = storage.Client(project=GCP_PROJECT_ID)
         bucket = storage_client.bucket(GCP_BUCKET_NAME)
         
-        # Check if bucket exists
-        if not bucket.exists():
+        # Upload file (a missing bucket surfaces as NotFound, no extra
+        # bucket.exists() round trip)
+        blob = bucket.blob("COMBINED_FOOD_DATASET.csv")
+        local_size = local_file.stat().st_size
+        try:
+            if local_size > UPLOAD_CHUNK_SIZE:
+                transfer_manager.upload_chunks_concurrently(
+                    str(local_file),
+                    blob,
+                    chunk_size=UPLOAD_CHUNK_SIZE,
+                    max_workers=UPLOAD_MAX_WORKERS,
+                )
+            else:
+                blob.upload_from_filename(str(local_file))
+        except exceptions.NotFound:
             logger.error(f"❌ Bucket '{GCP_BUCKET_NAME}' does not exist!")
             logger.info("Please create the bucket in GCP Console or run:")
             logger.info(f"  gsutil mb -l {GCP_BUCKET_NAME} gs://{GCP_BUCKET_NAME}")
             return False
         
-        # Upload file
-        blob = bucket.blob("COMBINED_FOOD_DATASET.csv")
-        blob.upload_from_filename(str(local_file))
-        
         logger.info(f"✅ Successfully uploaded dataset to gs://{GCP_BUCKET_NAME}/COMBINED_FOOD_DATASET.csv")
         
-        # Verify upload
-        if blob.exists():
+        # Verify upload (one metadata read)
+        blob.reload()
+        if blob.size == local_size:
             logger.info(f"📊 File size: {blob.size / (1024*1024):.2f} MB")
             logger.info(f"🔗 GCS URI: gs://{GCP_BUCKET_NAME}/COMBINED_FOOD_DATASET.csv")
             return True
         else:
-            logger.error("❌ Upload verification failed")
+            logger.error(f"❌ Upload verification failed: {blob.size} bytes in GCS, {local_size} locally")
             return False
             
     except Exception as e:
@@ -4,11 +4,12 @@ This script tests the connection to Google Cloud Platform services.
 """
 
 import os
-from dotenv import load_dotenv
+from _env import load_env
+from google.api_core import exceptions
 from google.cloud import aiplatform, storage
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 def test_gcp_setup():
     """Test GCP setup by verifying environment variables and API connections."""
@@ -56,22 +57,22 @@ def test_gcp_setup():
         storage_client = storage.Client(project=project_id)
         bucket = storage_client.bucket(bucket_name)
         
-        # Check if bucket exists
-        if bucket.exists():
-            print(f"   ✅ Successfully connected to bucket: {bucket_name}")
-            
-            # List bucket contents
-            blobs = list(bucket.list_blobs(max_results=5))
-            if blobs:
-                print(f"   📁 Found {len(blobs)} file(s) in the bucket (showing max 5):")
-                for blob in blobs:
-                    print(f"      - {blob.name}")
-            else:
-                print("   📁 Bucket is empty (no files found)")
-        else:
+        # List bucket contents (a missing bucket raises NotFound, so no
+        # separate bucket.exists() call is needed)
+        try:
+            blobs = list(bucket.list_blobs(max_results=5, fields="items(name),nextPageToken"))
+        except exceptions.NotFound:
             print(f"   ⚠️  Bucket '{bucket_name}' does not exist or you don't have access to it.")
             print("   Please create the bucket in the GCP console or check your permissions.")
             return False
+        
+        print(f"   ✅ Successfully connected to bucket: {bucket_name}")
+        if blobs:
+            print(f"   📁 Found {len(blobs)} file(s) in the bucket (showing max 5):")
+            for blob in blobs:
+                print(f"      - {blob.name}")
+        else:
+            print("   📁 Bucket is empty (no files found)")
             
     except Exception as e:
         print(f"   ❌ Failed to access GCS bucket: {str(e)}")
@@ -4,13 +4,16 @@ Surveiller le déploiement en temps réel.
 import os
 import time
 from google.cloud import aiplatform
-from dotenv import load_dotenv
+from _env import load_env
+from _gcp_client import endpoint_rname
 
-load_dotenv()
+load_env()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
 REGION = os.getenv("GCP_REGION", "europe-west2")
 ENDPOINT_ID = "5724492940806455296"
+POLL_MIN_SECONDS = 5
+POLL_MAX_SECONDS = 60
 
 aiplatform.init(project=PROJECT_ID, location=REGION)
 
@@ -23,21 +26,35 @@ print(f"Région: {REGION}\n")
 print(f"🔗 Console: https://console.cloud.google.com/vertex-ai/online-prediction/endpoints/{ENDPOINT_ID}?project={PROJECT_ID}\n")
 print(f"{'='*80}\n")
 
-print("🔄 Vérification toutes les 30 secondes...")
+print(f"🔄 Vérification toutes les {POLL_MIN_SECONDS} à {POLL_MAX_SECONDS} secondes...")
 print("   Appuyez sur Ctrl+C pour arrêter\n")
 
+
+def format_elapsed(elapsed: float) -> str:
+    minutes, seconds = divmod(int(elapsed), 60)
+    return f"{minutes} minutes {seconds} secondes"
+
+
 check_count = 0
-start_time = time.time()
+delay = POLL_MIN_SECONDS
+endpoint = None
+start_time = time.monotonic()
+elapsed = 0.0
 
 try:
     while True:
         check_count += 1
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
+        minutes, seconds = divmod(int(elapsed), 60)
         
-        print(f"[{time.strftime('%H:%M:%S')}] Check #{check_count} (après {int(elapsed/60)} min {int(elapsed%60)} sec)")
+        print(f"[{time.strftime('%H:%M:%S')}] Check #{check_count} (après {minutes} min {seconds} sec)")
         
         try:
-            endpoint = aiplatform.Endpoint(f"projects/432566588992/locations/{REGION}/endpoints/{ENDPOINT_ID}")
+            # Construit une seule fois, puis simplement rafraîchi à chaque tour
+            if endpoint is None:
+                endpoint = aiplatform.Endpoint(endpoint_rname(ENDPOINT_ID, region=REGION))
+            else:
+                endpoint._sync_gca_resource()
             
             if endpoint.gca_resource.deployed_models:
                 print(f"\n{'='*80}")
@@ -58,7 +75,7 @@ try:
                                 print(f"   GPU: {accel} x {count}")
                     print()
                 
-                print(f"⏱️  Temps total: {int(elapsed/60)} minutes {int(elapsed%60)} secondes\n")
+                print(f"⏱️  Temps total: {format_elapsed(elapsed)}\n")
                 print(f"{'='*80}")
                 print("🧪 TESTEZ MAINTENANT!")
                 print(f"{'='*80}\n")
@@ -71,19 +88,22 @@ try:
                 break
             else:
                 print(f"   ⏳ Toujours en cours de déploiement...")
-                print(f"   Prochaine vérification dans 30 secondes...\n")
+                print(f"   Prochaine vérification dans {delay} secondes...\n")
                 
         except Exception as e:
             print(f"   ⚠️  Erreur lors de la vérification: {e}")
-            print(f"   Nouvelle tentative dans 30 secondes...\n")
+            print(f"   Nouvelle tentative dans {delay} secondes...\n")
         
-        time.sleep(30)
+        # Backoff exponentiel: un déploiement rapide est vu tôt, un long
+        # déploiement n'est interrogé qu'une fois par minute
+        time.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
         
 except KeyboardInterrupt:
     print(f"\n\n{'='*80}")
     print("⏸️  Surveillance arrêtée par l'utilisateur")
     print(f"{'='*80}\n")
-    print(f"Temps écoulé: {int(elapsed/60)} minutes {int(elapsed%60)} secondes")
+    print(f"Temps écoulé: {format_elapsed(time.monotonic() - start_time)}")
     print(f"\nVous pouvez relancer ce script à tout moment:")
     print(f"  python scripts/check_endpoint_status.py\n")
     print(f"Ou vérifier dans la console:")
@@ -7,12 +7,18 @@ Phi-3 model for nutrition-related questions.
 To run:
     chainlit run src/app/main.py -w
 """
+import asyncio
 import os
 import re
 import subprocess
+import threading
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
 import chainlit as cl
+import orjson
 from dotenv import load_dotenv
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
@@ -22,25 +28,67 @@ load_dotenv()
 
 # Configuration
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID", "aerobic-polygon-460910-v9")
-GCP_PROJECT_NUMBER = os.getenv("GCP_PROJECT_NUMBER", "432566588992")
+GCP_PROJECT_NUMBER = os.getenv("GCP_PROJECT_NUMBER", GCP_PROJECT_ID)
 GCP_REGION = os.getenv("GCP_REGION", "europe-west2")
 GCP_ENDPOINT_ID = os.getenv("GCP_ENDPOINT_ID", "")  # Set this after deploying to endpoint
 
+# Application Default Credentials, resolved once and shared by all chat
+# sessions; the token (valid ~1 hour) is refreshed shortly before it expires
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+_CREDENTIALS = None
+_CREDENTIALS_LOCK = threading.Lock()
+
+# Shared HTTP session: keep-alive connections to the regional endpoint are
+# reused across messages. Connection errors, throttling and transient 5xx are
+# retried (3 retries, 4 attempts) with jittered exponential backoff, waiting
+# as long as a Retry-After header asks (POST included: a prediction has no
+# side effects). Read timeouts are not retried: the model may still be
+# generating, and a resend would only duplicate that work
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.5,
+            backoff_max=30,
+            backoff_jitter=1.0,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,
+            respect_retry_after_header=True,
+        ),
+    ),
+)
+SESSION.headers["Content-Type"] = "application/json"
+
 
 def get_access_token() -> str:
     """
     Get GCP access token using Application Default Credentials or gcloud CLI.
     
+    The cached token is returned until it gets within TOKEN_REFRESH_MARGIN of
+    its expiry; only one caller refreshes it at a time.
+    
     Returns:
         Access token string
     """
+    global _CREDENTIALS
     try:
         # Try using Application Default Credentials first
-        credentials, project = google.auth.default(
-            scopes=['https://www.googleapis.com/auth/cloud-platform']
-        )
-        credentials.refresh(Request())
-        return credentials.token
+        with _CREDENTIALS_LOCK:
+            if _CREDENTIALS is None:
+                _CREDENTIALS, _ = google.auth.default(
+                    scopes=['https://www.googleapis.com/auth/cloud-platform']
+                )
+            # google.auth keeps expiry as a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            expiry = _CREDENTIALS.expiry
+            if not _CREDENTIALS.valid or expiry is None or expiry - now < TOKEN_REFRESH_MARGIN:
+                _CREDENTIALS.refresh(Request(session=SESSION))
+            return _CREDENTIALS.token
     except Exception as e1:
         # Fallback to gcloud CLI
         try:
@@ -78,6 +126,26 @@ def build_endpoint_url() -> str:
     return url
 
 
+# Assistant turn in the generated text, up to the end marker
+ASSISTANT_RESPONSE_RE = re.compile(r"<\|assistant\|>\s*(.*?)(?:<\|end\||$)", re.DOTALL)
+
+# Client-side batching of concurrent messages (see PredictionBatcher)
+MAX_BATCH_SIZE = 8
+MAX_BATCH_WAIT_SECONDS = 0.025
+MAX_BATCH_CHARS = 4000
+
+# Built once; None until GCP_ENDPOINT_ID is configured
+ENDPOINT_URL = build_endpoint_url() if GCP_ENDPOINT_ID else None
+
+# Generation parameters, identical for every request (never mutated)
+PREDICTION_PARAMETERS = {
+    "max_new_tokens": 256,
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "do_sample": True
+}
+
+
 def extract_assistant_response(generated_text: str) -> str:
     """
     Extract the assistant's response from the model output.
@@ -89,8 +157,7 @@ def extract_assistant_response(generated_text: str) -> str:
         Cleaned assistant response
     """
     # Try to extract text after assistant marker
-    assistant_pattern = r"<\|assistant\|>\s*(.*?)(?:<\|end\||$)"
-    match = re.search(assistant_pattern, generated_text, re.DOTALL)
+    match = ASSISTANT_RESPONSE_RE.search(generated_text)
     
     if match:
         response = match.group(1).strip()
@@ -100,10 +167,125 @@ def extract_assistant_response(generated_text: str) -> str:
     return generated_text.strip()
 
 
+async def predict(prompts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Send one prediction request with an instance per prompt.
+    
+    Args:
+        prompts: User messages, one instance each
+        
+    Returns:
+        The endpoint's predictions, in the order of the prompts
+    """
+    # Get access token (a refresh blocks, so it runs off the event loop)
+    access_token = await asyncio.to_thread(get_access_token)
+    
+    # Endpoint URL (build_endpoint_url() raises the configuration error)
+    endpoint_url = ENDPOINT_URL or build_endpoint_url()
+    
+    # Prepare request (Content-Type is set on the session)
+    headers = {"Authorization": f"Bearer {access_token}"}
+    
+    payload = {
+        "instances": [
+            {"prompt": prompt} for prompt in prompts
+        ],
+        "parameters": PREDICTION_PARAMETERS
+    }
+    
+    # Send request from a worker thread so other chats keep being served
+    # while this one waits on the model
+    response = await asyncio.to_thread(
+        SESSION.post,
+        endpoint_url,
+        headers=headers,
+        data=orjson.dumps(payload),
+        timeout=60
+    )
+    
+    # Check response
+    response.raise_for_status()
+    
+    # Parse response
+    return orjson.loads(response.content).get("predictions", [])
+
+
+class PredictionBatcher:
+    """
+    Coalesce concurrent chat messages into shared predict calls.
+    
+    Messages are queued; a worker takes the first one, waits up to
+    MAX_BATCH_WAIT_SECONDS for more (at most MAX_BATCH_SIZE messages and
+    MAX_BATCH_CHARS characters, so one long prompt does not pad a whole batch)
+    and sends them as the instances of a single request. Each caller gets
+    the prediction at its own index.
+    """
+    
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker = None
+        self._in_flight = set()  # Keeps the send tasks referenced until done
+    
+    async def submit(self, prompt: str) -> Dict[str, Any]:
+        """Queue a prompt and wait for its prediction."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future))
+        return await future
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        carry = None
+        while True:
+            batch = [carry or await self._queue.get()]
+            carry = None
+            chars = len(batch[0][0])
+            deadline = loop.time() + MAX_BATCH_WAIT_SECONDS
+            
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    item = await asyncio.wait_for(
+                        self._queue.get(), max(0.0, deadline - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if chars + len(item[0]) > MAX_BATCH_CHARS:
+                    # Starts the next batch instead
+                    carry = item
+                    break
+                batch.append(item)
+                chars += len(item[0])
+            
+            # Sent in the background: the next batch is collected meanwhile
+            task = asyncio.create_task(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    @staticmethod
+    async def _send(batch) -> None:
+        try:
+            predictions = await predict([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(predictions[i] if i < len(predictions) else {})
+
+
+BATCHER = PredictionBatcher()
+
+
 async def call_vertex_ai_endpoint(user_message: str) -> str:
     """
     Send a prediction request to the Vertex AI endpoint.
     
+    Concurrent messages are batched into one request by BATCHER.
+    
     Args:
         user_message: User's input message
         
@@ -111,52 +293,13 @@ async def call_vertex_ai_endpoint(user_message: str) -> str:
         Model's response text
     """
     try:
-        # Get access token
-        access_token = get_access_token()
-        
-        # Build endpoint URL
-        endpoint_url = build_endpoint_url()
-        
-        # Prepare request
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
+        prediction = await BATCHER.submit(user_message)
         
-        payload = {
-            "instances": [
-                {"prompt": user_message}
-            ],
-            "parameters": {
-                "max_new_tokens": 256,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "do_sample": True
-            }
-        }
+        if "error" in prediction:
+            return f"⚠️ Error from model: {prediction['error']}"
         
-        # Send request
-        response = requests.post(
-            endpoint_url,
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
-        
-        # Check response
-        response.raise_for_status()
-        
-        # Parse response
-        result = response.json()
-        
-        if "predictions" in result and len(result["predictions"]) > 0:
-            prediction = result["predictions"][0]
-            
-            if "error" in prediction:
-                return f"⚠️ Error from model: {prediction['error']}"
-            
-            if "generated_text" in prediction:
-                return extract_assistant_response(prediction["generated_text"])
+        if "generated_text" in prediction:
+            return extract_assistant_response(prediction["generated_text"])
         
         return "⚠️ Unexpected response format from the model."
         
@@ -3,17 +3,58 @@ Custom EndpointHandler for Vertex AI model deployment.
 This handler loads the fine-tuned Phi-3 model and processes inference requests.
 """
 import os
-import re
+import json
 import torch
-from typing import Dict, List, Any
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
 from transformers import AutoModelForCausalLM, AutoTokenizer
 from peft import PeftModel
 
+# Optional vLLM engine (paged KV cache, continuous batching); the stock
+# Hugging Face container does not ship it, so generate() is the fallback
+try:
+    from vllm import LLM, SamplingParams
+    from vllm.lora.request import LoRARequest
+except ImportError:
+    LLM = None
+
 
 # Model directory - will be set to /mnt/models when running in Vertex AI container
 # For local testing, download the model from GCS to a local directory
 MODEL_DIR = os.getenv("AIP_STORAGE_URI", "/mnt/models")
 
+# Prompt lengths are padded to a multiple of this (128/256/384/512 tokens)
+PROMPT_BUCKET_SIZE = 128
+
+# Token ids of the most recent formatted prompts (templated questions repeat)
+TOKEN_CACHE_SIZE = 1024
+
+# Compile the model forward with CUDA graphs (mode="reduce-overhead"). Off by
+# default: depending on the GPU and batch sizes it can be slower. Only applies
+# with the static KV cache (fixed shapes); otherwise it is skipped with a note
+ENABLE_TORCH_COMPILE = os.getenv("ENABLE_TORCH_COMPILE", "0") == "1"
+
+# Placeholder rendered through the chat template once to find the text
+# around a user message
+_PROMPT_PLACEHOLDER = "\x00PROMPT\x00"
+
+
+def adapter_base_model(model_dir: str) -> Optional[str]:
+    """
+    Return the base model of a LoRA adapter directory.
+    
+    Args:
+        model_dir: Path to the directory containing the model artifacts
+        
+    Returns:
+        The adapter's base_model_name_or_path, or None for a full model
+    """
+    adapter_config_path = os.path.join(model_dir, "adapter_config.json")
+    if not os.path.exists(adapter_config_path):
+        return None
+    with open(adapter_config_path) as f:
+        return json.load(f)["base_model_name_or_path"]
+
 
 class EndpointHandler:
     """Handler for processing inference requests using a fine-tuned Hugging Face model."""
@@ -34,24 +75,150 @@ class EndpointHandler:
             trust_remote_code=True
         )
         self.tokenizer.pad_token = self.tokenizer.eos_token
-        self.tokenizer.padding_side = "right"
+        # Left padding: batched prompts must all end where generation starts
+        self.tokenizer.padding_side = "left"
+        
+        # The chat template is rendered once; a prompt is then formatted by
+        # plain concatenation
+        template = self.tokenizer.apply_chat_template(
+            [{"role": "user", "content": _PROMPT_PLACEHOLDER}],
+            tokenize=False,
+            add_generation_prompt=True
+        )
+        self._prompt_prefix, _, self._prompt_suffix = template.partition(_PROMPT_PLACEHOLDER)
+        self._token_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+        
+        # Generation stops at the end-of-turn marker as well as at EOS, so
+        # the new tokens are exactly the assistant's reply
+        self._stop_token_ids = [self.tokenizer.eos_token_id]
+        end_token_id = self.tokenizer.convert_tokens_to_ids("<|end|>")
+        if end_token_id is not None and end_token_id != self.tokenizer.unk_token_id:
+            self._stop_token_ids.append(end_token_id)
         
         # Determine device
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"💻 Using device: {self.device}")
         
-        # Load model
+        self.engine = None
+        self.lora_request = None
+        if LLM is not None and torch.cuda.is_available():
+            self._load_vllm(model_dir)
+            print("✅ vLLM engine loaded successfully!")
+            return
+        
+        # Load model, with FlashAttention-2 on Ampere and newer GPUs (it has
+        # no kernels for older ones, e.g. the T4); PyTorch's fused SDPA
+        # kernel otherwise or when flash-attn is missing. An adapter
+        # directory is loaded on its base model, then merged
         print("🤖 Loading model...")
-        self.model = AutoModelForCausalLM.from_pretrained(
-            model_dir,
+        use_fa2 = torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8
+        base_model = adapter_base_model(model_dir)
+        weights_dir = base_model or model_dir
+        model_kwargs = dict(
             device_map="auto" if torch.cuda.is_available() else None,
             torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
             trust_remote_code=True,
         )
+        try:
+            self.model = AutoModelForCausalLM.from_pretrained(
+                weights_dir,
+                attn_implementation="flash_attention_2" if use_fa2 else "sdpa",
+                **model_kwargs,
+            )
+        except (ImportError, ValueError) as e:
+            print(f"⚠️  FlashAttention-2 unavailable ({e}), using SDPA attention")
+            self.model = AutoModelForCausalLM.from_pretrained(
+                weights_dir,
+                attn_implementation="sdpa",
+                **model_kwargs,
+            )
+        
+        # Merge the LoRA weights into the base linears once, so decode runs
+        # on a plain model with no per-layer adapter matmuls
+        if base_model is not None:
+            print(f"🔗 Merging LoRA adapter into {base_model}...")
+            self.model = PeftModel.from_pretrained(self.model, model_dir).merge_and_unload()
         
         # Set model to evaluation mode
         self.model.eval()
+        
+        # Static KV cache on GPU: allocated once per shape instead of grown
+        # token by token, so decode steps keep fixed tensor shapes. Only for
+        # models that declare support for it, and with SDPA attention (the
+        # static cache does not work with FlashAttention-2). A short warm-up
+        # pays the allocation before the first request
+        attn_implementation = getattr(self.model.config, "_attn_implementation", None)
+        if (
+            torch.cuda.is_available()
+            and getattr(self.model, "_supports_static_cache", False)
+            and attn_implementation == "sdpa"
+        ):
+            self._enable_static_cache()
+        elif ENABLE_TORCH_COMPILE:
+            print(
+                "⚠️  ENABLE_TORCH_COMPILE ignored: the static KV cache is not used "
+                f"(attention: {attn_implementation}), and the dynamic cache would "
+                "recompile at every shape"
+            )
         print("✅ Model loaded successfully!")
+    
+    def _enable_static_cache(self) -> None:
+        """
+        Switch generation to the static KV cache (and optionally compile the
+        forward), falling back to the dynamic cache if the warm-up fails.
+        """
+        eager_forward = self.model.forward
+        self.model.generation_config.cache_implementation = "static"
+        if ENABLE_TORCH_COMPILE:
+            # Compiled during the warm-up below, before serving
+            print("⚙️  Compiling model forward (reduce-overhead)...")
+            self.model.forward = torch.compile(
+                self.model.forward, mode="reduce-overhead", fullgraph=False
+            )
+        
+        try:
+            warmup = self.tokenizer(["Hello"], return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                self.model.generate(
+                    **warmup,
+                    max_new_tokens=1,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                )
+        except Exception as e:
+            print(f"⚠️  Static cache warm-up failed ({e}), using the dynamic cache")
+            self.model.generation_config.cache_implementation = None
+            self.model.forward = eager_forward
+    
+    def _load_vllm(self, model_dir: str) -> None:
+        """
+        Start a vLLM engine on the model directory.
+        
+        A LoRA adapter directory is served on top of its base model through
+        a LoRARequest; a full (merged) model directory is loaded directly.
+        
+        Args:
+            model_dir: Path to the directory containing the model artifacts
+        """
+        print("🤖 Loading model with vLLM...")
+        self.model = None
+        base_model = adapter_base_model(model_dir)
+        
+        if base_model is not None:
+            self.engine = LLM(
+                model=base_model,
+                dtype="float16",
+                enable_lora=True,
+                max_model_len=1024,
+                trust_remote_code=True,
+            )
+            self.lora_request = LoRARequest("fine_tuned", 1, model_dir)
+        else:
+            self.engine = LLM(
+                model=model_dir,
+                dtype="float16",
+                max_model_len=1024,
+                trust_remote_code=True,
+            )
         
     def __call__(self, data: Dict[str, Any]) -> Dict[str, List[Dict[str, str]]]:
         """
@@ -101,80 +268,123 @@ class EndpointHandler:
             "top_p": parameters.get("top_p", 0.9),
             "do_sample": parameters.get("do_sample", True),
             "pad_token_id": self.tokenizer.eos_token_id,
+            "eos_token_id": self._stop_token_ids,
         }
         
-        predictions = []
+        predictions: List[Dict[str, str]] = [{} for _ in instances]
         
-        for instance in instances:
+        # Empty prompts get their error up front; the others are generated
+        # together and put back at their original position
+        batch_indices = []
+        formatted_prompts = []
+        for i, instance in enumerate(instances):
             prompt = instance.get("prompt", "")
             
             if not prompt:
-                predictions.append({"error": "Empty prompt"})
+                predictions[i] = {"error": "Empty prompt"}
                 continue
             
-            try:
-                # Apply chat template
-                messages = [{"role": "user", "content": prompt}]
-                formatted_prompt = self.tokenizer.apply_chat_template(
-                    messages,
-                    tokenize=False,
-                    add_generation_prompt=True
-                )
-                
-                # Tokenize input
-                inputs = self.tokenizer(
-                    formatted_prompt,
-                    return_tensors="pt",
-                    padding=True,
-                    truncation=True,
-                    max_length=512
-                ).to(self.device)
-                
-                # Generate response
-                with torch.no_grad():
-                    outputs = self.model.generate(
-                        **inputs,
-                        **generation_params
-                    )
-                
-                # Decode the generated text
-                generated_text = self.tokenizer.decode(
-                    outputs[0],
-                    skip_special_tokens=False
-                )
-                
-                # Extract only the assistant's response
-                response = self._extract_response(generated_text)
-                
-                predictions.append({"generated_text": response})
-                
-            except Exception as e:
-                print(f"❌ Error processing instance: {e}")
-                predictions.append({"error": str(e)})
+            # Apply chat template (cached prefix/suffix)
+            formatted_prompts.append(self._prompt_prefix + prompt + self._prompt_suffix)
+            batch_indices.append(i)
+        
+        if not formatted_prompts:
+            return {"predictions": predictions}
+        
+        try:
+            responses = self._generate(formatted_prompts, generation_params)
+            for i, response in zip(batch_indices, responses):
+                predictions[i] = {"generated_text": response}
+        
+        except Exception as e:
+            # Rare path: retry the instances one by one so a single bad
+            # prompt only fails its own prediction
+            print(f"❌ Error processing batch: {e}")
+            for i, formatted_prompt in zip(batch_indices, formatted_prompts):
+                try:
+                    response = self._generate([formatted_prompt], generation_params)[0]
+                    predictions[i] = {"generated_text": response}
+                except Exception as e:
+                    print(f"❌ Error processing instance: {e}")
+                    predictions[i] = {"error": str(e)}
         
         return {"predictions": predictions}
     
-    def _extract_response(self, generated_text: str) -> str:
+    def _generate(self, formatted_prompts: List[str], generation_params: Dict[str, Any]) -> List[str]:
+        """
+        Generate the responses for a batch with the loaded backend.
+        """
+        if self.engine is not None:
+            return self._generate_vllm(formatted_prompts, generation_params)
+        return self._generate_hf(formatted_prompts, generation_params)
+    
+    def _generate_vllm(self, formatted_prompts: List[str], generation_params: Dict[str, Any]) -> List[str]:
         """
-        Extract the assistant's response from the generated text.
+        Generate the responses with the vLLM engine, in one call.
         
-        Args:
-            generated_text: Full generated text including prompt and special tokens
-            
-        Returns:
-            Extracted assistant response
+        vLLM returns only the continuation, stopped at the end-of-turn marker.
+        """
+        sampling_params = SamplingParams(
+            max_tokens=generation_params["max_new_tokens"],
+            temperature=generation_params["temperature"] if generation_params["do_sample"] else 0.0,
+            top_p=generation_params["top_p"],
+            stop=["<|end|>"],
+        )
+        outputs = self.engine.generate(
+            formatted_prompts,
+            sampling_params,
+            lora_request=self.lora_request,
+        )
+        return [output.outputs[0].text.strip() for output in outputs]
+    
+    def _encode(self, formatted_prompt: str) -> List[int]:
         """
-        # Try to extract text after <|assistant|> token
-        assistant_pattern = r"<\|assistant\|>\s*(.*?)(?:<\|end\||$)"
-        match = re.search(assistant_pattern, generated_text, re.DOTALL)
+        Tokenize a formatted prompt, reusing the ids of recent prompts.
+        """
+        input_ids = self._token_cache.get(formatted_prompt)
+        if input_ids is not None:
+            self._token_cache.move_to_end(formatted_prompt)
+            return input_ids
+        
+        input_ids = self.tokenizer(
+            formatted_prompt,
+            truncation=True,
+            max_length=512
+        )["input_ids"]
+        self._token_cache[formatted_prompt] = input_ids
+        if len(self._token_cache) > TOKEN_CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return input_ids
+    
+    def _generate_hf(self, formatted_prompts: List[str], generation_params: Dict[str, Any]) -> List[str]:
+        """
+        Generate the responses with a single batched model.generate call.
+        """
+        # Token ids come from the cache when the prompt was seen recently;
+        # the batch is left-padded to a bucket of PROMPT_BUCKET_SIZE tokens
+        # so the same few input shapes recur
+        inputs = self.tokenizer.pad(
+            {"input_ids": [self._encode(prompt) for prompt in formatted_prompts]},
+            padding=True,
+            pad_to_multiple_of=PROMPT_BUCKET_SIZE,
+            return_tensors="pt",
+        ).to(self.device)
         
-        if match:
-            response = match.group(1).strip()
-            return response
+        # Single generate call for the whole batch
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                **generation_params
+            )
         
-        # Fallback: return the text after the last occurrence of the prompt
-        # This is a simple heuristic
-        return generated_text.split("<|assistant|>")[-1].strip() if "<|assistant|>" in generated_text else generated_text
+        # Decode only the new tokens: with left padding every row's prompt
+        # ends at the same column
+        prompt_len = inputs["input_ids"].shape[1]
+        generated_texts = self.tokenizer.batch_decode(
+            outputs[:, prompt_len:],
+            skip_special_tokens=True
+        )
+        return [generated_text.strip() for generated_text in generated_texts]
 
 
 # For local testing
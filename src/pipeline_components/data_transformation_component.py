@@ -9,9 +9,9 @@ from typing import Dict
 @component(
     base_image="python:3.11-slim",
     packages_to_install=[
-        "pandas==2.2.3",
-        "datasets==3.1.0",
+        "pyarrow==17.0.0",
         "gcsfs==2024.9.0",
+        "orjson==3.10.7",
         "google-cloud-storage==2.18.2",
     ],
 )
@@ -32,86 +32,116 @@ def data_transformation_component(
     Returns:
         Dictionary with dataset statistics
     """
-    import pandas as pd
-    import json
     import logging
-    from datasets import Dataset
+    import random
+    import gcsfs
+    import orjson
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
     
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
     
     logger.info(f"Loading data from {gcs_data_uri}")
     
-    # Load the dataset from GCS
-    df = pd.read_csv(gcs_data_uri)
-    logger.info(f"Loaded {len(df)} food items")
+    # Nutrition columns: (CSV column, label, unit suffix)
+    nutrition_fields = [
+        ('Caloric Value', 'Calories', ' kcal'),
+        ('Protein', 'Protein', 'g'),
+        ('Fat', 'Fat', 'g'),
+        ('Carbohydrates', 'Carbohydrates', 'g'),
+        ('Dietary Fiber', 'Fiber', 'g'),
+        ('Vitamin C', 'Vitamin C', 'mg'),
+        ('Calcium', 'Calcium', 'mg'),
+        ('Iron', 'Iron', 'mg'),
+    ]
     
-    # Create conversational format
-    conversations = []
-    for _, row in df.iterrows():
-        food_name = row['food']
-        
-        # Build nutritional information string
-        nutrition_info = []
-        if pd.notna(row.get('Caloric Value')):
-            nutrition_info.append(f"Calories: {row['Caloric Value']} kcal")
-        if pd.notna(row.get('Protein')):
-            nutrition_info.append(f"Protein: {row['Protein']}g")
-        if pd.notna(row.get('Fat')):
-            nutrition_info.append(f"Fat: {row['Fat']}g")
-        if pd.notna(row.get('Carbohydrates')):
-            nutrition_info.append(f"Carbohydrates: {row['Carbohydrates']}g")
-        if pd.notna(row.get('Dietary Fiber')):
-            nutrition_info.append(f"Fiber: {row['Dietary Fiber']}g")
-        if pd.notna(row.get('Vitamin C')):
-            nutrition_info.append(f"Vitamin C: {row['Vitamin C']}mg")
-        if pd.notna(row.get('Calcium')):
-            nutrition_info.append(f"Calcium: {row['Calcium']}mg")
-        if pd.notna(row.get('Iron')):
-            nutrition_info.append(f"Iron: {row['Iron']}mg")
-        
-        nutrition_text = ", ".join(nutrition_info)
-        
-        # Create conversation in Phi-3 format
-        conversation = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": f"What are the nutritional values for {food_name}?"
-                },
-                {
-                    "role": "assistant",
-                    "content": f"{food_name} contains: {nutrition_text}"
-                }
-            ]
-        }
-        conversations.append(conversation)
+    # Only the needed columns are parsed, and as text: the values are written
+    # out exactly as they appear in the CSV (empty cells are null), and
+    # nothing depends on per-block type inference. A column missing from the
+    # file comes back all null and is skipped.
+    columns = ["food"] + [column for column, _, _ in nutrition_fields]
+    read_options = pv.ReadOptions(block_size=8 << 20)
+    convert_options = pv.ConvertOptions(
+        column_types={column: pa.string() for column in columns},
+        strings_can_be_null=True,
+        include_columns=columns,
+        include_missing_columns=True,
+    )
     
-    logger.info(f"Created {len(conversations)} conversations")
+    # Rows go to the test set with probability 1 - train_test_split (seeded,
+    # so the split is reproducible)
+    rng = random.Random(42)
+    test_fraction = 1 - train_test_split
     
-    # Convert to Hugging Face Dataset - store both formats
-    dataset = Dataset.from_dict({
-        "messages": [c["messages"] for c in conversations],
-        "text": [f"<|user|>\n{c['messages'][0]['content']}<|end|>\n<|assistant|>\n{c['messages'][1]['content']}<|end|>" for c in conversations]
-    })
+    total_samples = 0
+    train_samples = 0
+    test_samples = 0
     
-    # Split the dataset
-    split_dataset = dataset.train_test_split(test_size=(1 - train_test_split), seed=42)
-    train_data = split_dataset["train"]
-    test_data = split_dataset["test"]
-    
-    logger.info(f"Train set size: {len(train_data)}")
-    logger.info(f"Test set size: {len(test_data)}")
-    
-    # Save as JSON Lines format
-    train_data.to_json(train_dataset.path, orient="records", lines=True)
-    test_data.to_json(test_dataset.path, orient="records", lines=True)
+    # Single streaming pass: parse the CSV from GCS block by block with
+    # Arrow and write each conversation straight to the train or test JSON
+    # Lines file
+    fs = gcsfs.GCSFileSystem()
+    with fs.open(gcs_data_uri, "rb") as source, \
+            open(train_dataset.path, "wb", buffering=1 << 20) as train_file, \
+            open(test_dataset.path, "wb", buffering=1 << 20) as test_file:
+        reader = pv.open_csv(source, read_options=read_options, convert_options=convert_options)
+        for batch in reader:
+            # Strings are built column-wise with Arrow compute kernels; a
+            # null nutrition value makes its "label: value unit" piece null,
+            # and null pieces are skipped in the join
+            food = pc.fill_null(batch.column("food"), "")
+            nutrition_parts = [
+                pc.binary_join_element_wise(f"{label}: ", batch.column(column), unit, "")
+                for column, label, unit in nutrition_fields
+            ]
+            nutrition_text = pc.fill_null(
+                pc.binary_join_element_wise(*nutrition_parts, ", ", null_handling="skip"), ""
+            )
+            questions = pc.binary_join_element_wise(
+                "What are the nutritional values for ", food, "?", ""
+            )
+            answers = pc.binary_join_element_wise(food, " contains: ", nutrition_text, "")
+            texts = pc.binary_join_element_wise(
+                "<|user|>\n", questions, "<|end|>\n<|assistant|>\n", answers, "<|end|>", ""
+            )
+            
+            # Split flags for the whole batch from one vectorised draw,
+            # seeded from the run's generator so the split is reproducible
+            uniforms = pc.random(batch.num_rows, initializer=rng.getrandbits(63))
+            is_test = pc.less(uniforms, test_fraction).to_pylist()
+            
+            for question, answer, text, to_test in zip(
+                questions.to_pylist(), answers.to_pylist(), texts.to_pylist(), is_test
+            ):
+                # Conversation in Phi-3 format, with both the chat messages and
+                # the flattened training text
+                record = {
+                    "messages": [
+                        {"role": "user", "content": question},
+                        {"role": "assistant", "content": answer},
+                    ],
+                    "text": text,
+                }
+                line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+                if to_test:
+                    test_file.write(line)
+                    test_samples += 1
+                else:
+                    train_file.write(line)
+                    train_samples += 1
+            
+            total_samples += batch.num_rows
     
+    logger.info(f"Created {total_samples} conversations")
+    logger.info(f"Train set size: {train_samples}")
+    logger.info(f"Test set size: {test_samples}")
     logger.info(f"Saved training data to {train_dataset.path}")
     logger.info(f"Saved test data to {test_dataset.path}")
     
     return {
-        "total_samples": len(conversations),
-        "train_samples": len(train_data),
-        "test_samples": len(test_data),
+        "total_samples": total_samples,
+        "train_samples": train_samples,
+        "test_samples": test_samples,
     }
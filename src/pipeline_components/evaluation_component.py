@@ -1,5 +1,5 @@
 """
-Evaluation component using RAGAS metrics.
+Evaluation component using RAGAS-style ROUGE and BLEU metrics.
 """
 from kfp.dsl import component, Input, Output, Dataset, Metrics
 from typing import Dict, List
@@ -9,7 +9,7 @@ from typing import Dict, List
     base_image="cicirello/pyaction:3.11",
     packages_to_install=[
         "pandas==2.2.3",
-        "ragas==0.2.6",
+        "sacrebleu==2.4.3",
         "datasets==3.1.0",
         "gcsfs==2024.9.0",
         "google-cloud-storage==2.18.2",
@@ -22,7 +22,7 @@ def evaluation_component(
     evaluation_results: Output[Dataset],
     aggregated_metrics: Output[Metrics],
 ) -> Dict[str, float]:
-    """Evaluate predictions using RAGAS metrics.
+    """Evaluate predictions with ROUGE-L and BLEU (RAGAS RougeScore/BleuScore).
     
     Args:
         predictions: CSV file with predictions
@@ -35,8 +35,9 @@ def evaluation_component(
     import pandas as pd
     import json
     import logging
-    from ragas.metrics import RougeScore, BleuScore
-    from ragas import SingleTurnSample
+    from functools import lru_cache
+    import sacrebleu
+    from rouge_score import rouge_scorer
     
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
@@ -46,63 +47,52 @@ def evaluation_component(
     df = pd.read_csv(predictions.path)
     logger.info(f"Loaded {len(df)} predictions")
     
-    # Define metrics
-    metrics_list = [
-        RougeScore(),
-        BleuScore(),
-    ]
+    user_inputs = df["user_input"].astype(str).tolist()
+    responses = df["extracted_response"].astype(str).tolist()
+    references = df["reference"].astype(str).tolist()
     
-    logger.info(f"Computing metrics: {[m.__class__.__name__ for m in metrics_list]}")
+    # Metrics, scored directly over the columns with the libraries RAGAS
+    # wraps: RougeScore is the stemmed ROUGE-L F-measure, BleuScore the
+    # sentence BLEU scaled to [0, 1]
+    metric_columns = ["RougeScore", "BleuScore"]
+    logger.info(f"Computing metrics: {metric_columns}")
     
-    # Compute per-sample metrics
-    per_sample_results = []
+    scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
     
-    for idx, row in df.iterrows():
-        user_input = str(row["user_input"])
-        response = str(row["extracted_response"])
-        reference = str(row["reference"])
-        
-        # Create sample
-        sample = SingleTurnSample(
-            user_input=user_input,
-            response=response,
-            reference=reference,
-        )
-        
-        # Compute metrics for this sample
-        sample_metrics = {
-            "user_input": user_input,
-            "reference": reference,
-            "response": response,
-        }
-        
-        for metric in metrics_list:
-            try:
-                score = metric.single_turn_score(sample)
-                sample_metrics[metric.__class__.__name__] = float(score)
-            except Exception as e:
-                logger.warning(f"Error computing {metric.__class__.__name__} for sample {idx}: {e}")
-                sample_metrics[metric.__class__.__name__] = 0.0
-        
-        per_sample_results.append(sample_metrics)
-        
-        if (idx + 1) % 20 == 0:
-            logger.info(f"Evaluated {idx + 1}/{len(df)} samples")
+    # Repeated (reference, response) pairs are tokenized and scored once
+    @lru_cache(maxsize=None)
+    def score_pair(reference: str, response: str):
+        rouge = scorer.score(reference, response)["rougeL"].fmeasure
+        bleu = sacrebleu.sentence_bleu(response, [reference]).score / 100
+        return rouge, bleu
+    
+    pair_scores = [
+        score_pair(reference, response)
+        for reference, response in zip(references, responses)
+    ]
+    rouge_scores = [rouge for rouge, _ in pair_scores]
+    bleu_scores = [bleu for _, bleu in pair_scores]
+    logger.info(f"Scored {score_pair.cache_info().currsize} distinct pairs for {len(pair_scores)} samples")
+    
+    # Per-sample results, built from the columns in one call
+    results_df = pd.DataFrame({
+        "user_input": user_inputs,
+        "reference": references,
+        "response": responses,
+        "RougeScore": rouge_scores,
+        "BleuScore": bleu_scores,
+    })
     
     # Save per-sample results
-    results_df = pd.DataFrame(per_sample_results)
     results_df.to_csv(evaluation_results.path, index=False)
     logger.info(f"Saved per-sample results to {evaluation_results.path}")
     
-    # Compute aggregated metrics
-    metric_columns = [m.__class__.__name__ for m in metrics_list]
-    aggregated = {}
+    # Compute aggregated metrics (all metric columns in one pass)
+    mean_scores = results_df[metric_columns].mean()
+    aggregated = {metric_name: float(score) for metric_name, score in mean_scores.items()}
     
-    for metric_name in metric_columns:
-        if metric_name in results_df.columns:
-            mean_score = results_df[metric_name].mean()
-            aggregated[metric_name] = float(mean_score)
-            logger.info(f"{metric_name}: {mean_score:.4f}")
+    for metric_name, mean_score in aggregated.items():
+        logger.info(f"{metric_name}: {mean_score:.4f}")
     
     # Calculate overall average
     aggregated["average_score"] = sum(aggregated.values()) / len(aggregated) if aggregated else 0.0
@@ -46,6 +46,10 @@ def fine_tuning_component(
     import torch
     import json
     import logging
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import Path
     from transformers import (
         AutoModelForCausalLM,
         AutoTokenizer,
@@ -62,10 +66,16 @@ def fine_tuning_component(
     logger.info(f"Loading model: {model_name}")
     logger.info(f"Using device: {torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'CPU'}")
     
+    # bf16 on Ampere and newer GPUs (no loss scaling, same range as fp32);
+    # fp16 with the configured compute dtype on older ones
+    use_bf16 = torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8
+    compute_dtype = torch.bfloat16 if use_bf16 else getattr(torch, quantization_config["bnb_4bit_compute_dtype"])
+    logger.info(f"Training precision: {'bf16' if use_bf16 else 'fp16'}")
+    
     # Configure quantization
     bnb_config = BitsAndBytesConfig(
         load_in_4bit=quantization_config["load_in_4bit"],
-        bnb_4bit_compute_dtype=getattr(torch, quantization_config["bnb_4bit_compute_dtype"]),
+        bnb_4bit_compute_dtype=compute_dtype,
         bnb_4bit_quant_type=quantization_config["bnb_4bit_quant_type"],
         bnb_4bit_use_double_quant=quantization_config["bnb_4bit_use_double_quant"],
     )
@@ -75,13 +85,27 @@ def fine_tuning_component(
     tokenizer.pad_token = tokenizer.eos_token
     tokenizer.padding_side = "right"
     
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
+    # FlashAttention-2 needs bf16/fp16 on Ampere+; PyTorch's fused SDPA
+    # kernel otherwise, or when flash-attn is not installed
+    model_kwargs = dict(
         quantization_config=bnb_config,
         device_map="auto",
         trust_remote_code=True,
-        torch_dtype=torch.float16,
+        torch_dtype=torch.bfloat16 if use_bf16 else torch.float16,
     )
+    try:
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            attn_implementation="flash_attention_2" if use_bf16 else "sdpa",
+            **model_kwargs,
+        )
+    except (ImportError, ValueError) as e:
+        logger.warning(f"FlashAttention-2 unavailable ({e}), using SDPA attention")
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            attn_implementation="sdpa",
+            **model_kwargs,
+        )
     
     # Prepare model for LoRA training
     model = prepare_model_for_kbit_training(model)
@@ -129,7 +153,8 @@ def fine_tuning_component(
         eval_steps=training_config["eval_steps"],
         eval_strategy="steps",
         save_strategy="steps",
-        fp16=True,
+        bf16=use_bf16,
+        fp16=not use_bf16,
         gradient_checkpointing=True,
         optim="paged_adamw_8bit",
         logging_dir=training_metrics.path,
@@ -154,10 +179,38 @@ def fine_tuning_component(
     logger.info("Starting training...")
     train_result = trainer.train()
     
-    # Save the fine-tuned model
-    logger.info(f"Saving model to {fine_tuned_model.path}")
-    trainer.model.save_pretrained(fine_tuned_model.path)
-    tokenizer.save_pretrained(fine_tuned_model.path)
+    # Save the fine-tuned model (adapter + tokenizer) to local disk first
+    local_model_dir = tempfile.mkdtemp(prefix="fine_tuned_model_")
+    logger.info(f"Saving model to {local_model_dir}")
+    trainer.model.save_pretrained(local_model_dir)
+    tokenizer.save_pretrained(local_model_dir)
+    
+    def upload_model_dir() -> None:
+        """Copy the saved model to the output artifact location."""
+        if fine_tuned_model.uri.startswith("gs://"):
+            from google.cloud import storage
+            from google.cloud.storage import transfer_manager
+            
+            bucket_name, _, prefix = fine_tuned_model.uri[len("gs://"):].partition("/")
+            filenames = [
+                str(path.relative_to(local_model_dir))
+                for path in Path(local_model_dir).rglob("*") if path.is_file()
+            ]
+            transfer_manager.upload_many_from_filenames(
+                storage.Client().bucket(bucket_name),
+                filenames,
+                source_directory=local_model_dir,
+                blob_name_prefix=f"{prefix.rstrip('/')}/",
+                max_workers=16,
+                worker_type=transfer_manager.THREAD,
+                raise_exception=True,
+            )
+        else:
+            shutil.copytree(local_model_dir, fine_tuned_model.path, dirs_exist_ok=True)
+    
+    # The upload runs in the background while the evaluation pass uses the GPU
+    upload_executor = ThreadPoolExecutor(max_workers=1)
+    upload_future = upload_executor.submit(upload_model_dir)
     
     # Log metrics
     final_metrics = {
@@ -170,6 +223,11 @@ def fine_tuning_component(
     eval_results = trainer.evaluate()
     final_metrics["eval_loss"] = float(eval_results.get("eval_loss", 0))
     
+    # Wait for the model upload (re-raises an upload error)
+    upload_future.result()
+    upload_executor.shutdown()
+    logger.info(f"Uploaded model to {fine_tuned_model.uri}")
+    
     logger.info(f"Training completed! Final metrics: {final_metrics}")
     
     # Log metrics to Kubeflow
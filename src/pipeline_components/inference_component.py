@@ -13,7 +13,6 @@ from typing import Dict
         "datasets==3.0.0",
         "accelerate==1.0.1",
         "bitsandbytes==0.43.3",
-        "pandas==2.2.3",
         "gcsfs==2024.9.0",
         "google-cloud-storage==2.18.2",
     ],
@@ -38,7 +37,7 @@ def inference_component(
         Dictionary with prediction statistics
     """
     import torch
-    import pandas as pd
+    import csv
     import json
     import re
     import logging
@@ -73,8 +72,10 @@ def inference_component(
     logger.info(f"Loading test dataset from {test_dataset.path}")
     dataset = load_dataset("json", data_files=test_dataset.path, split="train")
     
-    # Limit samples for evaluation
+    # Limit samples for evaluation, drawn at random: test.jsonl keeps the
+    # CSV row order, so its first rows are not a representative sample
     num_samples = min(len(dataset), max_samples)
+    dataset = dataset.shuffle(seed=42).select(range(num_samples))
     logger.info(f"Generating predictions for {num_samples} samples")
     
     # Generate predictions
@@ -134,18 +135,22 @@ def inference_component(
         if (i + 1) % 10 == 0:
             logger.info(f"Processed {i + 1}/{num_samples} samples")
     
-    # Save predictions as CSV
-    df = pd.DataFrame(results)
-    df.to_csv(predictions.path, index=False)
+    # Save predictions as CSV, written straight from the result dicts
+    with open(predictions.path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["user_input", "reference", "extracted_response"])
+        writer.writeheader()
+        writer.writerows(results)
     logger.info(f"Saved predictions to {predictions.path}")
     
-    # Log sample predictions
-    logger.info("\nSample predictions:")
-    for i in range(min(3, len(df))):
-        logger.info(f"\n--- Sample {i+1} ---")
-        logger.info(f"User: {df.iloc[i]['user_input']}")
-        logger.info(f"Reference: {df.iloc[i]['reference']}")
-        logger.info(f"Prediction: {df.iloc[i]['extracted_response']}")
+    # Log sample predictions (read from the result dicts, skipped entirely
+    # when INFO is filtered out)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\nSample predictions:")
+        for i, result in enumerate(results[:3]):
+            logger.info(f"\n--- Sample {i+1} ---")
+            logger.info(f"User: {result['user_input']}")
+            logger.info(f"Reference: {result['reference']}")
+            logger.info(f"Prediction: {result['extracted_response']}")
     
     return {
         "total_predictions": len(results),